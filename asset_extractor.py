@@ -25,6 +25,8 @@ except ImportError as e:
     print("Please ensure exalt-extractor is properly installed and configured")
     sys.exit(1)
 
+from vision.asset_loader import AssetLoader
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -351,6 +353,9 @@ def main():
         # Create asset index
         extractor.create_asset_index()
         
+        # Pack the matchable sprites into a memory-mapped atlas for fast loading
+        AssetLoader(str(extractor.output_path)).build_atlas()
+        
         # Cleanup if requested
         if args.cleanup:
             extractor.cleanup()
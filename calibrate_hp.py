@@ -8,6 +8,7 @@ import numpy as np
 import mss
 import json
 import os
+import sys
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QPushButton, QLabel, QSpinBox, QGroupBox, QFileDialog, QMessageBox, QApplication)
 from PySide6.QtCore import Qt, QTimer
@@ -166,7 +167,9 @@ class HPCalibrator(QMainWindow):
         try:
             with mss.mss() as sct:
                 monitor = sct.monitors[1]  # Primary monitor
-                screenshot = np.array(sct.grab(monitor))
+                # View the BGRA pixels in place; the BGR conversion makes the only copy
+                shot = sct.grab(monitor)
+                screenshot = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
                 frame = cv2.cvtColor(screenshot, cv2.COLOR_BGRA2BGR)
                 self.current_screenshot = frame
                 self.update_display()
@@ -319,6 +322,11 @@ class HPCalibrator(QMainWindow):
             with open(config_path, 'w') as f:
                 json.dump(config, f, indent=2)
             
+            # If the bot's detection runs in this process, apply the new region now
+            detection = sys.modules.get('vision.detection')
+            if detection is not None:
+                detection.reload_hp_config()
+            
             self.status_label.setText("Configuration saved!")
             QMessageBox.information(
                 self, "Success", 
@@ -401,7 +409,6 @@ class HPCalibrator(QMainWindow):
 
 def main():
     """Run the calibration tool"""
-    import sys
     app = QApplication(sys.argv)
     window = HPCalibrator()
     window.show()
@@ -142,7 +142,7 @@ def check_vision_system():
     
     try:
         from vision.detection import get_calibration_status, capture_screen, get_hp_percent
-        from vision.asset_loader import AssetLoader
+        from vision.asset_loader import get_loader
         
         # Test calibration status
         status = get_calibration_status()
@@ -161,7 +161,7 @@ def check_vision_system():
             print(f"  ⚠️  Screen capture issue: {e}")
         
         # Test asset loader
-        loader = AssetLoader("assets")
+        loader = get_loader("assets")
         enemies = loader.get_enemy_assets()
         print(f"  ✅ Asset loader: {len(enemies)} enemy assets")
         
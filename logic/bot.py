@@ -1,5 +1,6 @@
 import time
 import math
+import threading
 import logging
 import numpy as np
 import cv2
@@ -8,6 +9,7 @@ from PySide6.QtCore import QObject, Signal
 import win32gui
 import win32con
 
+from vision.capture import FrameProducer, grab_dxcam
 from input import keyboard, mouse
 
 class RotMGbot(QObject):
@@ -29,6 +31,9 @@ class RotMGbot(QObject):
         # Guard against accidental nexus on noisy reads
         self._low_hp_consecutive_count = 0
         
+        # Screen grabber per capturing thread, opened on first capture and reused
+        self._sct_local = threading.local()
+        
         # RotMG window detection
         self.rotmg_window_handle = None
         self.rotmg_window_rect = None
@@ -72,9 +77,27 @@ class RotMGbot(QObject):
             self.rotmg_window_handle = None
             self.rotmg_window_rect = None
 
+    def _grabber(self):
+        """This thread's mss instance (mss handles must not be shared between threads)"""
+        sct = getattr(self._sct_local, 'sct', None)
+        if sct is None:
+            sct = self._sct_local.sct = mss.mss()
+        return sct
+
+    def close_grabber(self):
+        """Close this thread's mss instance, if it opened one; the next capture reopens it"""
+        sct = getattr(self._sct_local, 'sct', None)
+        self._sct_local.sct = None
+        if sct is not None:
+            try:
+                sct.close()
+            except Exception as e:
+                logging.warning(f"Failed to close screen grabber: {e}")
+
     def capture_rotmg_window(self):
         """Capture specifically the RotMG window."""
         try:
+            region = None
             if self.rotmg_window_handle and self.rotmg_window_rect:
                 # Check if window still exists
                 if not win32gui.IsWindow(self.rotmg_window_handle):
@@ -84,22 +107,26 @@ class RotMGbot(QObject):
                 
                 # Get current window position
                 rect = win32gui.GetWindowRect(self.rotmg_window_handle)
-                x, y, w, h = rect[0], rect[1], rect[2] - rect[0], rect[3] - rect[1]
-                
-                # Create a new mss instance for this thread to avoid threading issues
-                with mss.mss() as sct:
-                    # Capture the specific window region
-                    monitor = {"top": y, "left": x, "width": w, "height": h}
-                    img = np.array(sct.grab(monitor))
-                    frame = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
-                    return frame
+                region = tuple(rect)
+            
+            # Desktop Duplication when dxcam is installed, else mss
+            frame = grab_dxcam(region)
+            if frame is not None:
+                return frame
+            
+            sct = self._grabber()
+            if region is not None:
+                # Capture the specific window region
+                x, y, w, h = region[0], region[1], region[2] - region[0], region[3] - region[1]
+                monitor = {"top": y, "left": x, "width": w, "height": h}
             else:
                 # Fallback to full screen if RotMG window not found
-                with mss.mss() as sct:
-                    monitor = sct.monitors[1]  # Primary monitor
-                    img = np.array(sct.grab(monitor))
-                    frame = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
-                    return frame
+                monitor = sct.monitors[1]  # Primary monitor
+            
+            # View the BGRA pixels in place; the BGR conversion makes the only copy
+            shot = sct.grab(monitor)
+            img = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+            return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
                 
         except Exception as e:
             self.status_signal.emit(f"Window capture failed: {e}")
@@ -278,8 +305,14 @@ class RotMGbot(QObject):
                         x, y, w_contour, h_contour = cv2.boundingRect(contour)
                         cx = x + w_contour // 2
                         cy = y + h_contour // 2
-                        dist = math.hypot(cx - w // 2, cy - h // 2)
-                        enemies.append({'center': (cx, cy), 'distance': dist, 'size': (w_contour, h_contour)})
+                        enemies.append({'center': (cx, cy), 'size': (w_contour, h_contour)})
+            
+            # Distance of every enemy from the frame center in one pass
+            if enemies:
+                centers = np.array([enemy['center'] for enemy in enemies], dtype=np.float64)
+                distances = np.hypot(centers[:, 0] - w // 2, centers[:, 1] - h // 2).tolist()
+                for enemy, dist in zip(enemies, distances):
+                    enemy['distance'] = dist
             
             return enemies
             
@@ -343,14 +376,9 @@ class RotMGbot(QObject):
         if not bullets:
             return None
         
-        # Simple dodge logic - move away from closest bullet
-        closest_bullet = min(bullets, key=lambda b: math.hypot(
-            b['center'][0] - player_pos[0], 
-            b['center'][1] - player_pos[1]
-        ))
-        
-        dx = player_pos[0] - closest_bullet['center'][0]
-        dy = player_pos[1] - closest_bullet['center'][1]
+        # Simple dodge logic - move away from closest bullet (squared distances rank the same)
+        offsets = np.array(player_pos) - np.array([b['center'] for b in bullets])
+        dx, dy = offsets[np.einsum('ij,ij->i', offsets, offsets).argmin()].tolist()
         
         # Normalize and return direction
         length = math.hypot(dx, dy)
@@ -411,6 +439,9 @@ class RotMGbot(QObject):
         loop_count = 0
         last_attack_time = 0
         
+        # Capture on a background thread so grabbing the next frame overlaps detection
+        frame_producer = FrameProducer(self.capture_screen, self.close_grabber).start()
+        
         try:
             while self._running:
                 loop_start = time.time()
@@ -422,7 +453,7 @@ class RotMGbot(QObject):
                 
                 try:
                     # 1. Screen capture (now targets RotMG window specifically)
-                    frame = self.capture_screen()
+                    frame = frame_producer.get_frame()
                     if frame is None:
                         self.status_signal.emit("Screen capture returned None, skipping frame")
                         time.sleep(0.5)  # Add delay to prevent rapid error loops
@@ -509,6 +540,7 @@ class RotMGbot(QObject):
             self.status_signal.emit(f"Critical bot error: {e}")
         
         # Cleanup
+        frame_producer.stop()
         self.stop_movement()
         self.status_signal.emit("Bot stopped.")
         logging.info("Bot loop ended.")
@@ -3,12 +3,15 @@ import math
 import logging
 import subprocess
 import re
+import threading
 from PySide6.QtCore import QObject, Signal
 import mss
 import numpy as np
 import cv2
 
 from vision import detection
+from vision.asset_loader import frame_signature
+from vision.capture import FrameProducer
 from input import keyboard, mouse
 
 class RotMGbotLinux(QObject):
@@ -38,6 +41,9 @@ class RotMGbotLinux(QObject):
         self.rotmg_window_info = None
         self.game_region = None
         
+        # Screen grabber per capturing thread, opened on first capture and reused
+        self._sct_local = threading.local()
+        
         # Initialize window detection
         self.find_rotmg_window()
         
@@ -159,31 +165,34 @@ class RotMGbotLinux(QObject):
     def capture_game_screen(self):
         """Capture screen of the game window or full screen"""
         try:
-            with mss.mss() as sct:
-                # Always try full screen first as fallback
-                if self.game_region and all(k in self.game_region for k in ['left', 'top', 'width', 'height']):
-                    # Validate coordinates
-                    if (self.game_region['left'] >= 0 and self.game_region['top'] >= 0 and 
-                        self.game_region['width'] > 0 and self.game_region['height'] > 0):
-                        try:
-                            # Capture specific game window
-                            monitor = self.game_region
-                            img = np.array(sct.grab(monitor))
-                            frame = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
-                            return frame
-                        except Exception as window_capture_error:
-                            logging.warning(f"Window capture failed, falling back to fullscreen: {window_capture_error}")
-                
-                # Fallback to full screen capture
-                monitor = sct.monitors[1]  # Primary monitor
-                img = np.array(sct.grab(monitor))
-                frame = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
-                return frame
+            # Reuse one display connection instead of reopening it every frame
+            sct = self._grabber()
+            
+            # Always try full screen first as fallback
+            if self.game_region and all(k in self.game_region for k in ['left', 'top', 'width', 'height']):
+                # Validate coordinates
+                if (self.game_region['left'] >= 0 and self.game_region['top'] >= 0 and 
+                    self.game_region['width'] > 0 and self.game_region['height'] > 0):
+                    try:
+                        # Capture specific game window
+                        return self._grab_bgr(sct, self.game_region)
+                    except Exception as window_capture_error:
+                        logging.warning(f"Window capture failed, falling back to fullscreen: {window_capture_error}")
+            
+            # Fallback to full screen capture
+            return self._grab_bgr(sct, sct.monitors[1])  # Primary monitor
                 
         except Exception as e:
             logging.error(f"Screen capture error: {e}")
             return None
 
+    @staticmethod
+    def _grab_bgr(sct, monitor):
+        """Grab a region as BGR; the BGRA pixels are viewed in place, so the conversion is the only copy"""
+        shot = sct.grab(monitor)
+        img = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+
     def on_user_key(self, key):
         """Callback for user key press events"""
         try:
@@ -200,6 +209,25 @@ class RotMGbotLinux(QObject):
     def stop(self):
         """Signal the bot loop to stop gracefully."""
         self._running = False
+        # The capture thread closes its own grabber as it exits
+        self.close_screen_grabber()
+
+    def _grabber(self):
+        """This thread's mss instance (mss handles must not be shared between threads)"""
+        sct = getattr(self._sct_local, 'sct', None)
+        if sct is None:
+            sct = self._sct_local.sct = mss.mss()
+        return sct
+
+    def close_screen_grabber(self):
+        """Close this thread's screen grabber, if it opened one; the next capture reopens it."""
+        sct = getattr(self._sct_local, 'sct', None)
+        self._sct_local.sct = None
+        if sct is not None:
+            try:
+                sct.close()
+            except Exception as e:
+                logging.warning(f"Failed to close screen grabber: {e}")
 
     def run(self):
         """Main bot loop optimized for Linux/Proton"""
@@ -220,150 +248,158 @@ class RotMGbotLinux(QObject):
         consecutive_failures = 0
         max_failures = 10  # Stop after 10 consecutive failures
         
-        while self._running:
-            try:
-                loop_start = time.time()
-                loop_count += 1
+        # Capture on a background thread so grabbing the next frame overlaps detection
+        frame_producer = FrameProducer(self.capture_game_screen, self.close_screen_grabber).start()
+        
+        try:
+            while self._running:
+                try:
+                    loop_start = time.time()
+                    loop_count += 1
                 
-                # Log every 60 loops (about once per second)
-                if loop_count % 60 == 0:
-                    self.status_signal.emit(f"Bot running - loop {loop_count}")
+                    # Log every 60 loops (about once per second)
+                    if loop_count % 60 == 0:
+                        self.status_signal.emit(f"Bot running - loop {loop_count}")
                 
-                # 1. Screen capture with timeout
-                frame = None
-                try:
-                    frame = self.capture_game_screen()
-                    if frame is not None:
-                        consecutive_failures = 0  # Reset failure counter on success
-                    else:
+                    # 1. Screen capture with timeout
+                    frame = None
+                    try:
+                        frame = frame_producer.get_frame()
+                        if frame is not None:
+                            consecutive_failures = 0  # Reset failure counter on success
+                        else:
+                            consecutive_failures += 1
+                            self.status_signal.emit(f"Screen capture failed (attempt {consecutive_failures})")
+                            if consecutive_failures >= max_failures:
+                                self.status_signal.emit("Too many capture failures, stopping bot")
+                                break
+                            time.sleep(0.1)
+                            continue
+                    except Exception as e:
                         consecutive_failures += 1
-                        self.status_signal.emit(f"Screen capture failed (attempt {consecutive_failures})")
+                        self.status_signal.emit(f"Screen capture error: {e}")
                         if consecutive_failures >= max_failures:
-                            self.status_signal.emit("Too many capture failures, stopping bot")
+                            self.status_signal.emit("Too many capture errors, stopping bot")
                             break
                         time.sleep(0.1)
                         continue
-                except Exception as e:
-                    consecutive_failures += 1
-                    self.status_signal.emit(f"Screen capture error: {e}")
-                    if consecutive_failures >= max_failures:
-                        self.status_signal.emit("Too many capture errors, stopping bot")
-                        break
-                    time.sleep(0.1)
-                    continue
 
-                # 2. Vision: detect game elements (with timeout protection)
-                try:
-                    player_hp = detection.get_hp_percent(frame)
-                    enemies = detection.find_enemies(frame)
-                    bullets = detection.find_bullets(frame)
-                    loot_items = detection.find_loot(frame)
-                    obstacles = detection.find_obstacles(frame)
+                    # 2. Vision: detect game elements (with timeout protection)
+                    try:
+                        player_hp = detection.get_hp_percent(frame)
+                        # Fingerprint the frame once for every template matcher
+                        signature = frame_signature(frame)
+                        enemies = detection.find_enemies_array(frame, signature)
+                        bullets = detection.find_bullets_array(frame, signature)
+                        loot_items = detection.find_loot(frame, signature)
                     
-                    if detection.inventory_is_full(frame):
-                        self.inventory_full = True
-                    else:
-                        self.inventory_full = False
+                        if detection.inventory_is_full(frame):
+                            self.inventory_full = True
+                        else:
+                            self.inventory_full = False
                     
-                    # Log detection results occasionally
-                    if loop_count % 120 == 0:  # Every 2 seconds
-                        self.status_signal.emit(f"Detection: HP={player_hp}%, Enemies={len(enemies)}, Bullets={len(bullets)}")
+                        # Log detection results occasionally
+                        if loop_count % 120 == 0:  # Every 2 seconds
+                            self.status_signal.emit(f"Detection: HP={player_hp}%, Enemies={len(enemies)}, Bullets={len(bullets)}")
                         
-                except Exception as e:
-                    self.status_signal.emit(f"Detection failed: {e}")
-                    time.sleep(0.1)
-                    continue
+                    except Exception as e:
+                        self.status_signal.emit(f"Detection failed: {e}")
+                        time.sleep(0.1)
+                        continue
 
-                # 3. Decision Making:
-                # Auto-Nexus: if HP below threshold, trigger Nexus
-                if player_hp is not None and player_hp <= self.auto_nexus_percent:
-                    logging.warning(f"HP {player_hp}% <= threshold! Auto-Nexus activated.")
-                    self.status_signal.emit("Auto-Nexus triggered! HP low.")
-                    # Press the Nexus key (teleport to Nexus)
-                    nexus_key = self.keybinds.get('nexus', 'r')
-                    self.keyboard.tap_key(nexus_key)
-                    time.sleep(1)  # small delay after nexusing
-                    self._running = False
-                    continue
+                    # 3. Decision Making:
+                    # Auto-Nexus: if HP below threshold, trigger Nexus
+                    if player_hp is not None and player_hp <= self.auto_nexus_percent:
+                        logging.warning(f"HP {player_hp}% <= threshold! Auto-Nexus activated.")
+                        self.status_signal.emit("Auto-Nexus triggered! HP low.")
+                        # Press the Nexus key (teleport to Nexus)
+                        nexus_key = self.keybinds.get('nexus', 'r')
+                        self.keyboard.tap_key(nexus_key)
+                        time.sleep(1)  # small delay after nexusing
+                        self._running = False
+                        continue
 
-                # Combat logic (simplified to prevent freezing)
-                if enemies and len(enemies) > 0:
-                    target = enemies[0]  # take first enemy
-                    if 'center' in target:
-                        ex, ey = target['center']
-                        
+                    # Combat logic (simplified to prevent freezing)
+                    if len(enemies) > 0:
+                        ex, ey = enemies.centers[0].tolist()  # take first enemy
+                    
                         # Aim at enemy
                         self.mouse.move_to(ex, ey)
                         # Attack
                         self.mouse.click(button='left')
-                        self.status_signal.emit(f"Enemy detected at {target['center']}, attacking.")
-                        
+                        self.status_signal.emit(f"Enemy detected at {(ex, ey)}, attacking.")
+                    
+                        # Enemy offset from the frame center
+                        dx = ex - frame.shape[1]//2
+                        dy = ey - frame.shape[0]//2
+                    
                         # Movement based on mode (simplified)
                         if self.movement_mode.lower().startswith("kit"):  # Kiting
-                            if 'distance' in target and target['distance'] < 100:  # if enemy too close
+                            if math.hypot(dx, dy) < 100:  # if enemy too close
                                 # Move away from enemy
-                                dx = target['center'][0] - frame.shape[1]//2
-                                dy = target['center'][1] - frame.shape[0]//2
                                 move_x, move_y = -dx, -dy
                                 keyboard.move_towards(move_x, move_y, self.keyboard, self.keybinds)
                             else:
                                 keyboard.release_movement_keys(self.keyboard, self.keybinds)
                         else:
                             # Circle-Strafe
-                            dx = target['center'][0] - frame.shape[1]//2
-                            dy = target['center'][1] - frame.shape[0]//2
                             perp_x, perp_y = -dy, dx
                             keyboard.move_towards(perp_x, perp_y, self.keyboard, self.keybinds)
-                else:
-                    # No enemies seen, stop moving/attacking
-                    keyboard.release_movement_keys(self.keyboard, self.keybinds)
+                    else:
+                        # No enemies seen, stop moving/attacking
+                        keyboard.release_movement_keys(self.keyboard, self.keybinds)
                 
-                # Bullet dodging (simplified)
-                if bullets and len(bullets) > 0:
-                    for b in bullets[:3]:  # Limit to first 3 bullets to prevent freezing
-                        if 'center' in b and detection.is_bullet_dangerous(b):
-                            dodge_dir = detection.get_dodge_direction(b)
+                    # Bullet dodging (simplified): dodge the first dangerous one of the first 3 bullets
+                    if len(bullets) > 0:
+                        dangerous, dodge = detection.classify_bullets(bullets)
+                        dangerous = np.flatnonzero(dangerous[:3])
+                        if len(dangerous) > 0:
+                            dodge_dir = detection.DODGE_DIRECTIONS[dodge[dangerous[0]]]
                             keyboard.move_direction(dodge_dir, self.keyboard, self.keybinds, duration=0.1)
                             self.status_signal.emit("Dodging projectile!")
-                            break  # Only dodge one bullet per loop
 
-                # Looting logic (simplified)
-                if loot_items and len(loot_items) > 0:
-                    if self.inventory_full:
-                        worst_slot = detection.find_worst_item_slot(frame)
-                        if worst_slot is not None:
-                            logging.info(f"Inventory full. Dropping item in slot {worst_slot}.")
-                            self.status_signal.emit("Inventory full; dropping least valuable item.")
-                            mouse.drop_item(worst_slot, self.mouse, self.keybinds)
-                            time.sleep(0.5)
-                            self.inventory_full = False
+                    # Looting logic (simplified)
+                    if loot_items and len(loot_items) > 0:
+                        if self.inventory_full:
+                            worst_slot = detection.find_worst_item_slot(frame)
+                            if worst_slot is not None:
+                                logging.info(f"Inventory full. Dropping item in slot {worst_slot}.")
+                                self.status_signal.emit("Inventory full; dropping least valuable item.")
+                                mouse.drop_item(worst_slot, self.mouse, self.keybinds)
+                                time.sleep(0.5)
+                                self.inventory_full = False
                     
-                    # Pick up first desired loot item
-                    for item in loot_items[:2]:  # Limit to first 2 items
-                        if 'name' in item and 'center' in item:
-                            item_name = item['name']
-                            value = detection.get_item_value(item_name)
-                            if value and value >= 0:
-                                ix, iy = item['center']
-                                self.mouse.move_to(ix, iy)
-                                self.mouse.click(button='left')
-                                logging.info(f"Picking up loot: {item_name} at {item['center']}")
-                                self.status_signal.emit(f"Looting item: {item_name}")
-                                time.sleep(0.2)
-                                break
+                        # Pick up first desired loot item
+                        for item in loot_items[:2]:  # Limit to first 2 items
+                            if 'name' in item and 'center' in item:
+                                item_name = item['name']
+                                value = detection.get_item_value(item_name)
+                                if value and value >= 0:
+                                    ix, iy = item['center']
+                                    self.mouse.move_to(ix, iy)
+                                    self.mouse.click(button='left')
+                                    logging.info(f"Picking up loot: {item_name} at {item['center']}")
+                                    self.status_signal.emit(f"Looting item: {item_name}")
+                                    time.sleep(0.2)
+                                    break
 
-                # 4. Maintain loop timing ~30 FPS (reduced from 60 to prevent freezing)
-                loop_end = time.time()
-                elapsed = loop_end - loop_start
-                if elapsed < 1/30:
-                    time.sleep(1/30 - elapsed)
+                    # 4. Maintain loop timing ~30 FPS (reduced from 60 to prevent freezing)
+                    loop_end = time.time()
+                    elapsed = loop_end - loop_start
+                    if elapsed < 1/30:
+                        time.sleep(1/30 - elapsed)
                     
-            except Exception as e:
-                logging.error(f"Error in main bot loop: {e}")
-                self.status_signal.emit(f"Bot loop error: {e}")
-                time.sleep(0.5)  # Wait before retrying
-                continue
-
+                except Exception as e:
+                    logging.error(f"Error in main bot loop: {e}")
+                    self.status_signal.emit(f"Bot loop error: {e}")
+                    time.sleep(0.5)  # Wait before retrying
+                    continue
+        finally:
+            # Always stop the capture thread (it closes its own grabber as it exits)
+            if not frame_producer.stop():
+                logging.warning("Capture thread still running; it will close its screen grabber when it exits")
+            self.close_screen_grabber()
+        
         logging.info("Linux RotMG Bot loop terminated.")
         self.status_signal.emit("Bot stopped.")
         # Ensure movement keys released when stopping
@@ -4,96 +4,99 @@ Simple test script to verify bot startup
 """
 import sys
 import os
-import traceback
+import argparse
+from tests.logging_setup import get_test_logger, flush_test_log, format_failure
+
+log = get_test_logger()
 
 def test_imports():
     """Test if all required modules can be imported"""
-    print("Testing imports...")
+    log.info("Testing imports...")
     
     try:
         from PySide6.QtWidgets import QApplication
-        print("✅ PySide6 imported successfully")
+        log.info("✅ PySide6 imported successfully")
     except ImportError as e:
-        print(f"❌ PySide6 import failed: {e}")
+        log.error(f"❌ PySide6 import failed: {e}")
         return False
     
     try:
         from gui.window import BotWindow
-        print("✅ GUI window imported successfully")
+        log.info("✅ GUI window imported successfully")
     except ImportError as e:
-        print(f"❌ GUI window import failed: {e}")
+        log.error(f"❌ GUI window import failed: {e}")
         return False
     
     try:
         from config import settings
-        print("✅ Config settings imported successfully")
+        log.info("✅ Config settings imported successfully")
     except ImportError as e:
-        print(f"❌ Config settings import failed: {e}")
+        log.error(f"❌ Config settings import failed: {e}")
         return False
     
     try:
         from logic.bot import RotMGbot
-        print("✅ Bot logic imported successfully")
+        log.info("✅ Bot logic imported successfully")
     except ImportError as e:
-        print(f"❌ Bot logic import failed: {e}")
+        log.error(f"❌ Bot logic import failed: {e}")
         return False
     
     try:
         from vision.detection import get_hp_percent, find_enemies
-        print("✅ Vision detection imported successfully")
+        log.info("✅ Vision detection imported successfully")
     except ImportError as e:
-        print(f"❌ Vision detection import failed: {e}")
+        log.error(f"❌ Vision detection import failed: {e}")
         return False
     
     try:
         from input import keyboard, mouse
-        print("✅ Input modules imported successfully")
+        log.info("✅ Input modules imported successfully")
     except ImportError as e:
-        print(f"❌ Input modules import failed: {e}")
+        log.error(f"❌ Input modules import failed: {e}")
         return False
     
     return True
 
 def test_config_loading():
     """Test if configuration can be loaded"""
-    print("\nTesting configuration loading...")
+    log.info("\nTesting configuration loading...")
     
     try:
         from config import settings
         config = settings.load_config()
-        print("✅ Configuration loaded successfully")
-        print(f"   Auto-nexus threshold: {config.get('auto_nexus_percent', 'N/A')}%")
-        print(f"   Movement mode: {config.get('movement_mode', 'N/A')}")
-        print(f"   Player class: {config.get('player_class', 'N/A')}")
+        log.info("✅ Configuration loaded successfully")
+        log.info(f"   Auto-nexus threshold: {config.get('auto_nexus_percent', 'N/A')}%")
+        log.info(f"   Movement mode: {config.get('movement_mode', 'N/A')}")
+        log.info(f"   Player class: {config.get('player_class', 'N/A')}")
         return True
     except Exception as e:
-        print(f"❌ Configuration loading failed: {e}")
+        log.error(f"❌ Configuration loading failed: {e}")
         return False
 
 def test_asset_loading():
     """Test if assets can be loaded"""
-    print("\nTesting asset loading...")
+    log.info("\nTesting asset loading...")
     
     try:
-        from vision.asset_loader import AssetLoader
-        loader = AssetLoader("assets")
-        print("✅ Asset loader created successfully")
+        from vision.asset_loader import get_loader
+        loader = get_loader("assets")
+        log.info("✅ Asset loader created successfully")
         
         # Test if asset index exists
         if loader.asset_index:
-            print(f"   Found {len(loader.asset_index.get('enemies', []))} enemy assets")
-            print(f"   Found {len(loader.asset_index.get('projectiles', []))} projectile assets")
+            log.info(f"   Found {len(loader.asset_index.get('enemies', []))} enemy assets")
+            log.info(f"   Found {len(loader.asset_index.get('projectiles', []))} projectile assets")
         else:
-            print("   ⚠️  No asset index found")
+            log.info("   ⚠️  No asset index found")
         
         return True
     except Exception as e:
-        print(f"❌ Asset loading failed: {e}")
+        log.error(f"❌ Asset loading failed: {e}")
         return False
 
 def test_gui_creation():
     """Test if GUI can be created (without showing it)"""
-    print("\nTesting GUI creation...")
+    log.info("\nTesting GUI creation...")
     
     try:
         from PySide6.QtWidgets import QApplication
@@ -110,20 +113,24 @@ def test_gui_creation():
         
         # Create window (but don't show it)
         window = BotWindow(config)
-        print("✅ GUI window created successfully")
+        log.info("✅ GUI window created successfully")
         
         # Clean up
         window.deleteLater()
         
         return True
     except Exception as e:
-        print(f"❌ GUI creation failed: {e}")
-        print(traceback.format_exc())
+        log.error(f"❌ GUI creation failed: {format_failure(e)}")
         return False
 
-def main():
+def main(argv=None):
     """Run all tests"""
-    print("=== RotMG Bot Startup Test ===\n")
+    parser = argparse.ArgumentParser(description="Verify the RotMG bot can start up")
+    parser.add_argument('--fail-fast', action='store_true',
+                        help="stop at the first failing test instead of running the rest")
+    args = parser.parse_args(argv)
+    
+    log.info("=== RotMG Bot Startup Test ===\n")
     
     tests = [
         test_imports,
@@ -136,24 +143,28 @@ def main():
     total = len(tests)
     
     for test in tests:
-        if test():
+        ok = test()
+        if ok:
             passed += 1
-        print()
+        log.info("")
+        flush_test_log()
+        if not ok and args.fail_fast:
+            break
     
-    print(f"=== Test Results: {passed}/{total} tests passed ===")
+    log.info(f"=== Test Results: {passed}/{total} tests passed ===")
     
     if passed == total:
-        print("✅ All tests passed! The bot should be ready to run.")
-        print("\nNext steps:")
-        print("1. Run: python main.py")
-        print("2. Configure HP bar region if needed")
-        print("3. Start RotMG and test the bot")
+        log.info("✅ All tests passed! The bot should be ready to run.")
+        log.info("\nNext steps:")
+        log.info("1. Run: python main.py")
+        log.info("2. Configure HP bar region if needed")
+        log.info("3. Start RotMG and test the bot")
     else:
-        print("❌ Some tests failed. Please check the errors above.")
-        print("\nCommon solutions:")
-        print("1. Run: python setup_bot.py")
-        print("2. Install missing dependencies")
-        print("3. Check file permissions")
+        log.error("❌ Some tests failed. Please check the errors above.")
+        log.info("\nCommon solutions:")
+        log.info("1. Run: python setup_bot.py")
+        log.info("2. Install missing dependencies")
+        log.info("3. Check file permissions")
     
     return passed == total
 
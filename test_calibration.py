@@ -10,39 +10,43 @@ from pathlib import Path
 # Add current directory to path
 sys.path.append(str(Path(__file__).parent))
 
+from tests.logging_setup import get_test_logger, flush_test_log
+
+log = get_test_logger()
+
 def test_calibration_tool():
     """Test the calibration tool"""
-    print("Testing Calibration Tool...")
+    log.info("Testing Calibration Tool...")
     
     try:
         # Test importing the calibration tool
         from vision.calibration_tool import VisionCalibrationTool
-        print("✅ Calibration tool imported successfully")
+        log.info("✅ Calibration tool imported successfully")
         
         # Test creating the tool (without running GUI)
-        print("Testing calibration tool creation...")
+        log.info("Testing calibration tool creation...")
         # Note: We won't actually run the GUI in this test to avoid blocking
         
         # Test calibration data loading
         calib_file = Path("config/calibration.json")
         if calib_file.exists():
-            print("✅ Calibration file exists")
+            log.info("✅ Calibration file exists")
         else:
-            print("⚠️  No calibration file found (this is normal for first run)")
+            log.info("⚠️  No calibration file found (this is normal for first run)")
         
-        print("✅ Calibration tool test completed")
+        log.info("✅ Calibration tool test completed")
         return True
         
     except ImportError as e:
-        print(f"❌ Failed to import calibration tool: {e}")
+        log.error(f"❌ Failed to import calibration tool: {e}")
         return False
     except Exception as e:
-        print(f"❌ Error testing calibration tool: {e}")
+        log.error(f"❌ Error testing calibration tool: {e}")
         return False
 
 def test_vision_detection():
     """Test vision detection with calibration"""
-    print("\nTesting Vision Detection...")
+    log.info("\nTesting Vision Detection...")
     
     try:
         from vision.detection import (
@@ -52,66 +56,66 @@ def test_vision_detection():
         
         # Test calibration status
         status = get_calibration_status()
-        print(f"✅ Calibration status: {status}")
+        log.info(f"✅ Calibration status: {status}")
         
         # Test screen capture (if possible)
         try:
             frame = capture_screen()
-            print(f"✅ Screen capture successful: {frame.shape}")
+            log.info(f"✅ Screen capture successful: {frame.shape}")
             
             # Test HP detection
             hp = get_hp_percent(frame)
-            print(f"✅ HP detection: {hp}%")
+            log.info(f"✅ HP detection: {hp}%")
             
         except Exception as e:
-            print(f"⚠️  Screen capture not available: {e}")
+            log.info(f"⚠️  Screen capture not available: {e}")
         
-        print("✅ Vision detection test completed")
+        log.info("✅ Vision detection test completed")
         return True
         
     except ImportError as e:
-        print(f"❌ Failed to import vision detection: {e}")
+        log.error(f"❌ Failed to import vision detection: {e}")
         return False
     except Exception as e:
-        print(f"❌ Error testing vision detection: {e}")
+        log.error(f"❌ Error testing vision detection: {e}")
         return False
 
 def test_asset_loader():
     """Test asset loader functionality"""
-    print("\nTesting Asset Loader...")
+    log.info("\nTesting Asset Loader...")
     
     try:
-        from vision.asset_loader import AssetLoader
+        from vision.asset_loader import get_loader
         
         # Test asset loader creation
-        loader = AssetLoader("assets")
-        print("✅ Asset loader created successfully")
+        loader = get_loader("assets")
+        log.info("✅ Asset loader created successfully")
         
         # Test getting assets
         enemies = loader.get_enemy_assets()
         projectiles = loader.get_projectile_assets()
         terrain = loader.get_terrain_assets()
         
-        print(f"✅ Assets loaded - Enemies: {len(enemies)}, Projectiles: {len(projectiles)}, Terrain: {len(terrain)}")
+        log.info(f"✅ Assets loaded - Enemies: {len(enemies)}, Projectiles: {len(projectiles)}, Terrain: {len(terrain)}")
         
         # Test detection pipeline
         pipeline, matchers = loader.create_detection_pipeline()
-        print(f"✅ Detection pipeline created with {len(pipeline)} categories")
+        log.info(f"✅ Detection pipeline created with {len(pipeline)} categories")
         
-        print("✅ Asset loader test completed")
+        log.info("✅ Asset loader test completed")
         return True
         
     except ImportError as e:
-        print(f"❌ Failed to import asset loader: {e}")
+        log.error(f"❌ Failed to import asset loader: {e}")
         return False
     except Exception as e:
-        print(f"❌ Error testing asset loader: {e}")
+        log.error(f"❌ Error testing asset loader: {e}")
         return False
 
 def main():
     """Run all tests"""
-    print("RotMG Bot - Calibration and Vision Testing")
-    print("=" * 50)
+    log.info("RotMG Bot - Calibration and Vision Testing")
+    log.info("=" * 50)
     
     tests = [
         ("Calibration Tool", test_calibration_tool),
@@ -123,24 +127,25 @@ def main():
     total = len(tests)
     
     for test_name, test_func in tests:
-        print(f"\n{'='*20} {test_name} {'='*20}")
+        log.info(f"\n{'='*20} {test_name} {'='*20}")
         if test_func():
             passed += 1
         else:
-            print(f"❌ {test_name} test failed")
+            log.error(f"❌ {test_name} test failed")
+        flush_test_log()
     
-    print(f"\n{'='*50}")
-    print(f"Test Results: {passed}/{total} tests passed")
+    log.info(f"\n{'='*50}")
+    log.info(f"Test Results: {passed}/{total} tests passed")
     
     if passed == total:
-        print("✅ All tests passed! Calibration system is ready.")
-        print("\nNext steps:")
-        print("1. Run: python vision/calibration_tool.py")
-        print("2. Use the GUI to calibrate HP bar coordinates")
-        print("3. Test with real game screenshots")
-        print("4. Save calibration settings")
+        log.info("✅ All tests passed! Calibration system is ready.")
+        log.info("\nNext steps:")
+        log.info("1. Run: python vision/calibration_tool.py")
+        log.info("2. Use the GUI to calibrate HP bar coordinates")
+        log.info("3. Test with real game screenshots")
+        log.info("4. Save calibration settings")
     else:
-        print("❌ Some tests failed. Please check the errors above.")
+        log.error("❌ Some tests failed. Please check the errors above.")
     
     return passed == total
 
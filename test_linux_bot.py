@@ -9,52 +9,53 @@ import logging
 import time
 from config import settings
 from logic.bot_linux import RotMGbotLinux
+from tests.logging_setup import get_test_logger, flush_test_log, format_failure
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s [%(levelname)s] %(message)s'
 )
+log = get_test_logger()
 
 def test_linux_bot():
     """Test the Linux bot functionality"""
-    print("🧪 Testing Linux RotMG Bot...")
+    log.info("🧪 Testing Linux RotMG Bot...")
     
     # Load config
     config = settings.load_config()
-    print(f"✅ Config loaded: auto_nexus={config.get('auto_nexus_percent', 30)}%")
+    log.info(f"✅ Config loaded: auto_nexus={config.get('auto_nexus_percent', 30)}%")
     
     # Create bot instance
     try:
         bot = RotMGbotLinux(config)
-        print("✅ Linux bot created successfully")
+        log.info("✅ Linux bot created successfully")
         
         # Test window detection
-        print("🔍 Testing window detection...")
+        log.info("🔍 Testing window detection...")
         if bot.rotmg_window_info:
-            print(f"✅ Window found: {bot.rotmg_window_info['name']}")
+            log.info(f"✅ Window found: {bot.rotmg_window_info['name']}")
         else:
-            print("⚠️  No window found (will run in fullscreen mode)")
+            log.info("⚠️  No window found (will run in fullscreen mode)")
         
         # Test screen capture
-        print("📸 Testing screen capture...")
+        log.info("📸 Testing screen capture...")
         frame = bot.capture_game_screen()
         if frame is not None:
-            print(f"✅ Screen capture successful: {frame.shape}")
+            log.info(f"✅ Screen capture successful: {frame.shape}")
         else:
-            print("❌ Screen capture failed")
+            log.error("❌ Screen capture failed")
         
-        print("\n🎉 Linux bot test completed successfully!")
-        print("The bot is ready to use with: python main_linux.py")
+        log.info("\n🎉 Linux bot test completed successfully!")
+        log.info("The bot is ready to use with: python main_linux.py")
         
     except Exception as e:
-        print(f"❌ Error testing Linux bot: {e}")
-        import traceback
-        traceback.print_exc()
+        log.error(f"❌ Error testing Linux bot: {format_failure(e)}")
         return False
     
     return True
 
 if __name__ == "__main__":
     success = test_linux_bot()
+    flush_test_log()
     sys.exit(0 if success else 1) 
\ No newline at end of file
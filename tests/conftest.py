@@ -0,0 +1,13 @@
+"""
+pytest configuration for the RotMG Bot test suite
+"""
+
+import sys
+from pathlib import Path
+
+# Make the repository root importable (vision, logic, tests.logging_setup, ...)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: timing-sensitive performance tests (deselect with -m 'not slow')")
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Console logging shared by the RotMG Bot test scripts
+Buffers diagnostic output and writes it out in batches
+"""
+
+import logging
+import logging.handlers
+import os
+import sys
+import traceback
+
+TEST_LOGGER_NAME = "rotmg.tests"
+
+
+def get_test_logger():
+    """Return the test logger, buffering console output in batches of 64 records"""
+    log = logging.getLogger(TEST_LOGGER_NAME)
+    if not log.handlers:
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(logging.Formatter('%(message)s'))
+        log.addHandler(logging.handlers.MemoryHandler(capacity=64, flushLevel=logging.ERROR, target=console))
+        log.setLevel(logging.INFO)
+        log.propagate = False
+    return log
+
+
+def format_failure(exc):
+    """Describe a test failure: the exception line only, or the full traceback if ROTMG_VERBOSE is set"""
+    if os.environ.get("ROTMG_VERBOSE"):
+        return "".join(traceback.format_exception(type(exc), exc, exc.__traceback__)).rstrip()
+    return traceback.format_exception_only(type(exc), exc)[-1].rstrip()
+
+
+def flush_test_log():
+    """Write out any buffered test output (call when a test function finishes)"""
+    for handler in logging.getLogger(TEST_LOGGER_NAME).handlers:
+        handler.flush()
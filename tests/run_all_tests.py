@@ -4,16 +4,21 @@ Comprehensive test runner for RotMG Bot
 Tests all components: vision, input, logic, GUI, and integration
 """
 
-import unittest
 import sys
 import os
 import logging
 from pathlib import Path
 import time
 
+import pytest
+
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
+from tests.logging_setup import get_test_logger, flush_test_log
+
+log = get_test_logger()
+
 def setup_test_environment():
     """Setup test environment and logging"""
     # Create logs directory
@@ -29,199 +34,122 @@ def setup_test_environment():
         ]
     )
 
-def run_vision_tests():
-    """Run vision detection tests"""
-    print("\n" + "="*60)
-    print("RUNNING VISION DETECTION TESTS")
-    print("="*60)
-    
-    from tests.test_vision_detection import run_vision_tests
-    return run_vision_tests()
-
-def run_input_tests():
-    """Run input automation tests"""
-    print("\n" + "="*60)
-    print("RUNNING INPUT AUTOMATION TESTS")
-    print("="*60)
-    
-    # Import and run input tests
-    try:
-        from tests.test_input_automation import TestInputAutomation
-        suite = unittest.TestLoader().loadTestsFromTestCase(TestInputAutomation)
-        runner = unittest.TextTestRunner(verbosity=2)
-        result = runner.run(suite)
-        return result.wasSuccessful()
-    except ImportError as e:
-        print(f"Input tests not available: {e}")
-        return True
-
-def run_logic_tests():
-    """Run bot logic tests"""
-    print("\n" + "="*60)
-    print("RUNNING BOT LOGIC TESTS")
-    print("="*60)
-    
-    # Import and run logic tests
-    try:
-        from tests.test_bot_logic import TestBotLogic
-        suite = unittest.TestLoader().loadTestsFromTestCase(TestBotLogic)
-        runner = unittest.TextTestRunner(verbosity=2)
-        result = runner.run(suite)
-        return result.wasSuccessful()
-    except ImportError as e:
-        print(f"Logic tests not available: {e}")
-        return True
-
-def run_gui_tests():
-    """Run GUI tests"""
-    print("\n" + "="*60)
-    print("RUNNING GUI TESTS")
-    print("="*60)
-    
-    # Import and run GUI tests
-    try:
-        from tests.test_gui import TestGUI
-        suite = unittest.TestLoader().loadTestsFromTestCase(TestGUI)
-        runner = unittest.TextTestRunner(verbosity=2)
-        result = runner.run(suite)
-        return result.wasSuccessful()
-    except ImportError as e:
-        print(f"GUI tests not available: {e}")
-        return True
-
-def run_integration_tests():
-    """Run integration tests"""
-    print("\n" + "="*60)
-    print("RUNNING INTEGRATION TESTS")
-    print("="*60)
-    
-    # Import and run integration tests
-    try:
-        from tests.test_integration import TestIntegration
-        suite = unittest.TestLoader().loadTestsFromTestCase(TestIntegration)
-        runner = unittest.TextTestRunner(verbosity=2)
-        result = runner.run(suite)
-        return result.wasSuccessful()
-    except ImportError as e:
-        print(f"Integration tests not available: {e}")
-        return True
+def suite_name_for(nodeid):
+    """Summary name of the test module a pytest node id belongs to"""
+    module_stem = Path(nodeid.split("::")[0]).stem
+    return module_stem.replace('test_', '', 1).replace('_', ' ').title()
 
-def run_asset_tests():
-    """Run asset loading and validation tests"""
-    print("\n" + "="*60)
-    print("RUNNING ASSET TESTS")
-    print("="*60)
-    
-    # Import and run asset tests
-    try:
-        from tests.test_assets import TestAssets
-        suite = unittest.TestLoader().loadTestsFromTestCase(TestAssets)
-        runner = unittest.TextTestRunner(verbosity=2)
-        result = runner.run(suite)
-        return result.wasSuccessful()
-    except ImportError as e:
-        print(f"Asset tests not available: {e}")
-        return True
+class SuiteResults:
+    """
+    pytest plugin grouping test reports by module, so one pytest session yields
+    the per-suite results; each suite is written to the summary as soon as its last test finishes
+    """
+    
+    def __init__(self, summary):
+        self.summary = summary
+        self.results = {}
+        self._remaining = {}
+    
+    def _result(self, nodeid):
+        return self.results.setdefault(suite_name_for(nodeid), {'success': True, 'duration': 0.0})
+    
+    def pytest_collectreport(self, report):
+        # A module that fails to import has no tests to report; record it straight away
+        if report.failed and report.nodeid:
+            result = self._result(report.nodeid)
+            result['success'] = False
+            # Last line of the import traceback, without pytest's "E   " marker
+            error = str(report.longrepr).strip().splitlines()[-1]
+            result['error'] = error[1:].strip() if error.startswith("E ") else error
+            write_suite_summary(self.summary, suite_name_for(report.nodeid), result)
+    
+    def pytest_collection_modifyitems(self, items):
+        for item in items:
+            suite_name = suite_name_for(item.nodeid)
+            self._remaining[suite_name] = self._remaining.get(suite_name, 0) + 1
+    
+    def pytest_runtest_logreport(self, report):
+        result = self._result(report.nodeid)
+        result['duration'] += report.duration
+        if report.failed:
+            result['success'] = False
+        
+        if report.when == 'teardown':
+            suite_name = suite_name_for(report.nodeid)
+            self._remaining[suite_name] -= 1
+            if not self._remaining[suite_name]:
+                write_suite_summary(self.summary, suite_name, result)
 
-def run_performance_tests():
-    """Run performance tests"""
-    print("\n" + "="*60)
-    print("RUNNING PERFORMANCE TESTS")
-    print("="*60)
-    
-    # Import and run performance tests
-    try:
-        from tests.test_performance import TestPerformance
-        suite = unittest.TestLoader().loadTestsFromTestCase(TestPerformance)
-        runner = unittest.TextTestRunner(verbosity=2)
-        result = runner.run(suite)
-        return result.wasSuccessful()
-    except ImportError as e:
-        print(f"Performance tests not available: {e}")
-        return True
+def write_suite_summary(f, suite_name, result):
+    """Append one suite's result to the summary file and flush it to disk"""
+    f.write(f"{suite_name}:\n")
+    f.write(f"  Status: {'PASS' if result['success'] else 'FAIL'}\n")
+    f.write(f"  Duration: {result['duration']:.2f}s\n")
+    if 'error' in result:
+        f.write(f"  Error: {result['error']}\n")
+    f.write("\n")
+    f.flush()
 
 def run_all_tests():
     """Run all test suites"""
     setup_test_environment()
     
-    print("RotMG Bot - Comprehensive Test Suite")
-    print("="*60)
-    print(f"Starting tests at {time.strftime('%Y-%m-%d %H:%M:%S')}")
+    log.info("RotMG Bot - Comprehensive Test Suite")
+    log.info("="*60)
+    log.info(f"Starting tests at {time.strftime('%Y-%m-%d %H:%M:%S')}")
     
     # Track results
     test_results = {}
-    total_tests = 0
-    passed_tests = 0
     
-    # Run each test suite
-    test_suites = [
-        ("Vision Detection", run_vision_tests),
-        ("Input Automation", run_input_tests),
-        ("Bot Logic", run_logic_tests),
-        ("GUI", run_gui_tests),
-        ("Integration", run_integration_tests),
-        ("Assets", run_asset_tests),
-        ("Performance", run_performance_tests),
-    ]
-    
-    for suite_name, test_function in test_suites:
+    # Stream results to the summary file as each suite finishes so a crash
+    # mid-run keeps everything recorded so far
+    with open("logs/test_summary.txt", "w", buffering=1) as summary:
+        summary.write("RotMG Bot Test Results\n")
+        summary.write("=" * 40 + "\n")
+        summary.write(f"Date: {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        
+        # Discover and run every test module in a single pytest session; a module
+        # that fails to import is reported as a failed suite without stopping the rest
+        plugin = SuiteResults(summary)
+        exit_code = None
         try:
-            start_time = time.time()
-            success = test_function()
-            end_time = time.time()
-            
-            test_results[suite_name] = {
-                'success': success,
-                'duration': end_time - start_time
-            }
-            
-            if success:
-                passed_tests += 1
-            total_tests += 1
-            
+            exit_code = pytest.main([str(Path(__file__).parent), "-v", "--continue-on-collection-errors"],
+                                    plugins=[plugin])
         except Exception as e:
-            print(f"Error running {suite_name} tests: {e}")
-            test_results[suite_name] = {
+            log.exception("Error running tests: %s", e)
+            test_results['Test Run'] = {
                 'success': False,
                 'duration': 0,
                 'error': str(e)
             }
-            total_tests += 1
+            write_suite_summary(summary, 'Test Run', test_results['Test Run'])
+        flush_test_log()
+        
+        test_results = {**plugin.results, **test_results}
+        total_tests = len(test_results)
+        passed_tests = sum(1 for result in test_results.values() if result['success'])
+        
+        success_rate = (passed_tests / total_tests * 100) if total_tests > 0 else 0
+        summary.write(f"Overall: {passed_tests}/{total_tests} passed ({success_rate:.1f}%)\n")
     
     # Print final results
-    print("\n" + "="*60)
-    print("FINAL TEST RESULTS")
-    print("="*60)
+    log.info("\n" + "="*60)
+    log.info("FINAL TEST RESULTS")
+    log.info("="*60)
     
     for suite_name, result in test_results.items():
         status = "PASS" if result['success'] else "FAIL"
         duration = f"{result['duration']:.2f}s"
-        print(f"{suite_name:20} | {status:4} | {duration:>8}")
+        log.info(f"{suite_name:20} | {status:4} | {duration:>8}")
         
         if 'error' in result:
-            print(f"  Error: {result['error']}")
-    
-    print("-" * 60)
-    success_rate = (passed_tests / total_tests * 100) if total_tests > 0 else 0
-    print(f"Overall: {passed_tests}/{total_tests} test suites passed ({success_rate:.1f}%)")
+            log.error("  Error: %s", result['error'])
     
-    # Save detailed results to file
-    with open("logs/test_summary.txt", "w") as f:
-        f.write("RotMG Bot Test Results\n")
-        f.write("=" * 40 + "\n")
-        f.write(f"Date: {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        
-        for suite_name, result in test_results.items():
-            f.write(f"{suite_name}:\n")
-            f.write(f"  Status: {'PASS' if result['success'] else 'FAIL'}\n")
-            f.write(f"  Duration: {result['duration']:.2f}s\n")
-            if 'error' in result:
-                f.write(f"  Error: {result['error']}\n")
-            f.write("\n")
-        
-        f.write(f"Overall: {passed_tests}/{total_tests} passed ({success_rate:.1f}%)\n")
+    log.info("-" * 60)
+    log.info(f"Overall: {passed_tests}/{total_tests} test suites passed ({success_rate:.1f}%)")
+    flush_test_log()
     
-    return passed_tests == total_tests
+    return exit_code == pytest.ExitCode.OK and passed_tests == total_tests
 
 if __name__ == "__main__":
     success = run_all_tests()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test suite for background screen capture (vision/capture.py)
+
+Run with pytest.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from vision.capture import FrameProducer
+
+
+class FakeClock:
+    """A clock that only moves when advanced, so frame ages do not depend on machine load"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def _counting_capture(captured, clock, seconds):
+    """A capture function taking `seconds` on clock that returns its 1-based call number"""
+    def capture():
+        captured.append(len(captured) + 1)
+        clock.advance(seconds)
+        return len(captured)
+    return capture
+
+
+def _wait_for_prefetch(producer, timeout=5.0):
+    """Wait until the capture thread has a prefetched frame ready"""
+    with producer._condition:
+        assert producer._condition.wait_for(lambda: producer._latest, timeout), "A frame should be prefetched"
+
+
+def test_frame_producer_drops_stale_frame():
+    """Test a prefetched frame that aged past a capture period is replaced by a fresh capture"""
+    clock = FakeClock()
+    captured = []
+    cleaned_up = []
+    producer = FrameProducer(_counting_capture(captured, clock, 0.02), lambda: cleaned_up.append(True),
+                             clock=clock).start()
+    try:
+        assert producer.get_frame(timeout=5.0) == 1, "The first frame should be the first capture"
+        _wait_for_prefetch(producer)
+        # Simulate a pause (e.g. waiting out a nexus); the frame prefetched meanwhile goes stale
+        clock.advance(1.0)
+        assert producer.get_frame(timeout=5.0) == 3, "A stale prefetched frame should be recaptured"
+        assert captured == [1, 2, 3], "The stale frame should be replaced by exactly one capture"
+    finally:
+        assert producer.stop(), "The capture thread should exit on stop"
+
+    assert cleaned_up == [True], "Cleanup should run once when the capture thread exits"
+
+
+def test_frame_producer_captures_on_demand():
+    """Test the producer prefetches one frame per frame taken instead of capturing back to back"""
+    clock = FakeClock()
+    captured = []
+    producer = FrameProducer(_counting_capture(captured, clock, 0.05), clock=clock).start()
+    try:
+        assert producer.get_frame(timeout=5.0) == 1, "The first frame should be the first capture"
+        _wait_for_prefetch(producer)
+        assert captured == [1, 2], "Only the next frame should be prefetched while the consumer is busy"
+        # A fresh enough prefetched frame is ready, so taking it must not wait for a capture
+        assert producer.get_frame(timeout=0) == 2, "A fresh enough prefetched frame should be handed out"
+    finally:
+        producer.stop()
+
+
+def test_frame_producer_keeps_prefetch_through_slow_detection():
+    """Test detection taking several capture periods still gets the prefetched frame, one capture per frame"""
+    clock = FakeClock()
+    captured = []
+    producer = FrameProducer(_counting_capture(captured, clock, 0.02), clock=clock).start()
+    try:
+        assert producer.get_frame(timeout=5.0) == 1, "The first frame should be the first capture"
+        for frame_number in range(2, 6):
+            _wait_for_prefetch(producer)
+            # A 100 ms detection pass: five times the capture duration
+            clock.advance(0.1)
+            assert producer.get_frame(timeout=0) == frame_number, \
+                "The prefetched frame should be handed out without waiting for a capture"
+        assert len(captured) <= 6, "Each frame taken should cost one capture, plus the next prefetch"
+    finally:
+        producer.stop()
+
+
+def test_frame_producer_capture_error():
+    """Test a failing capture is reported as a None frame rather than stopping the producer"""
+    def capture():
+        raise RuntimeError("capture failed")
+
+    producer = FrameProducer(capture).start()
+    try:
+        assert producer.get_frame(timeout=5.0) is None, "A failed capture should be reported as None"
+        assert producer.get_frame(timeout=5.0) is None, "The producer should keep running after a failure"
+    finally:
+        producer.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -1,339 +1,660 @@
 #!/usr/bin/env python3
 """
 Test suite for vision detection components
+
+Run with pytest (the perf test is marked slow: ``pytest -m "not slow"`` skips it).
+The TestVisionDetection / TestVisionPerformance classes at the bottom run the
+same tests under plain unittest for existing unittest-style callers.
 """
 
+import functools
+import inspect
 import unittest
 import cv2
 import numpy as np
 import os
 import sys
+import json
+import time
 import logging
+import statistics
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import pytest
+
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
 from vision.detection import (
-    capture_screen, find_enemies, find_bullets, find_loot, 
+    capture_screen, find_enemies, find_bullets, find_loot,
     get_hp_percent, infer_player_class, find_obstacles,
     inventory_is_full, find_worst_item_slot, get_item_value,
-    is_bullet_dangerous, get_dodge_direction
+    is_bullet_dangerous, get_dodge_direction,
+    DetectionArray, find_enemies_array, matchers
 )
-from vision.asset_loader import AssetLoader
-
-class TestVisionDetection(unittest.TestCase):
-    """Test cases for vision detection functionality"""
-    
-    @classmethod
-    def setUpClass(cls):
-        """Set up test environment once for all tests"""
-        # Configure logging
-        logging.basicConfig(level=logging.INFO)
-        
-        # Initialize asset loader
-        cls.asset_loader = AssetLoader("assets")
-        
-        # Create test images directory
-        cls.test_images_dir = Path("tests/test_images")
-        cls.test_images_dir.mkdir(exist_ok=True)
-        
-        # Create a test image if none exists
-        cls.create_test_image()
-        
-    @classmethod
-    def create_test_image(cls):
-        """Create a test image for testing if none exists"""
-        test_image_path = cls.test_images_dir / "test_screen.png"
-        
-        if not test_image_path.exists():
-            # Create a synthetic test image (1920x1080)
-            test_image = np.zeros((1080, 1920, 3), dtype=np.uint8)
-            
-            # Add a red HP bar at the bottom left
-            cv2.rectangle(test_image, (50, 900), (250, 920), (0, 0, 255), -1)
-            
-            # Add some colored rectangles to simulate enemies
-            cv2.rectangle(test_image, (500, 300), (550, 350), (0, 0, 255), -1)  # Red enemy
-            cv2.rectangle(test_image, (800, 400), (850, 450), (0, 0, 255), -1)  # Another red enemy
-            
-            # Add blue circles to simulate bullets
-            cv2.circle(test_image, (600, 500), 5, (255, 0, 0), -1)
-            cv2.circle(test_image, (700, 600), 5, (255, 0, 0), -1)
-            
-            # Add yellow rectangles to simulate loot
-            cv2.rectangle(test_image, (300, 600), (350, 650), (0, 255, 255), -1)
-            
-            cv2.imwrite(str(test_image_path), test_image)
-            logging.info(f"Created test image: {test_image_path}")
-    
-    def setUp(self):
-        """Set up for each test"""
-        self.test_image_path = self.test_images_dir / "test_screen.png"
-        self.test_image = cv2.imread(str(self.test_image_path))
-        self.assertIsNotNone(self.test_image, "Test image should be loaded")
-        
-    def test_capture_screen(self):
-        """Test screen capture functionality"""
-        try:
-            frame = capture_screen()
-            self.assertIsNotNone(frame, "Screen capture should return a frame")
-            self.assertEqual(len(frame.shape), 3, "Frame should be 3D (height, width, channels)")
-            self.assertEqual(frame.shape[2], 3, "Frame should have 3 color channels (BGR)")
-        except Exception as e:
-            self.skipTest(f"Screen capture not available: {e}")
-    
-    def test_hp_detection(self):
-        """Test HP bar detection"""
-        hp_percent = get_hp_percent(self.test_image)
-        
-        # HP detection should return a value between 0 and 100, or None
-        if hp_percent is not None:
-            self.assertIsInstance(hp_percent, (int, float), "HP should be numeric")
-            self.assertGreaterEqual(hp_percent, 0, "HP should be >= 0")
-            self.assertLessEqual(hp_percent, 100, "HP should be <= 100")
-        
-        logging.info(f"HP Detection test result: {hp_percent}%")
-    
-    def test_enemy_detection(self):
-        """Test enemy detection"""
-        enemies = find_enemies(self.test_image)
-        
-        self.assertIsInstance(enemies, list, "Enemies should be a list")
-        
-        for enemy in enemies:
-            self.assertIn('center', enemy, "Enemy should have center coordinates")
-            self.assertIn('distance', enemy, "Enemy should have distance")
-            self.assertIn('name', enemy, "Enemy should have a name")
-            
-            center = enemy['center']
-            self.assertIsInstance(center, tuple, "Center should be a tuple")
-            self.assertEqual(len(center), 2, "Center should have 2 coordinates")
-            
-            self.assertIsInstance(enemy['distance'], (int, float), "Distance should be numeric")
-            self.assertGreaterEqual(enemy['distance'], 0, "Distance should be >= 0")
-        
-        logging.info(f"Enemy detection test result: {len(enemies)} enemies found")
-    
-    def test_bullet_detection(self):
-        """Test bullet/projectile detection"""
-        bullets = find_bullets(self.test_image)
-        
-        self.assertIsInstance(bullets, list, "Bullets should be a list")
-        
-        for bullet in bullets:
-            self.assertIn('center', bullet, "Bullet should have center coordinates")
-            self.assertIn('name', bullet, "Bullet should have a name")
-            
-            center = bullet['center']
-            self.assertIsInstance(center, tuple, "Center should be a tuple")
-            self.assertEqual(len(center), 2, "Center should have 2 coordinates")
-        
-        logging.info(f"Bullet detection test result: {len(bullets)} bullets found")
-    
-    def test_loot_detection(self):
-        """Test loot detection"""
-        loot_items = find_loot(self.test_image)
-        
-        self.assertIsInstance(loot_items, list, "Loot items should be a list")
-        
-        for item in loot_items:
-            self.assertIn('center', item, "Loot item should have center coordinates")
-            self.assertIn('name', item, "Loot item should have a name")
-            
-            center = item['center']
-            self.assertIsInstance(center, tuple, "Center should be a tuple")
-            self.assertEqual(len(center), 2, "Center should have 2 coordinates")
-        
-        logging.info(f"Loot detection test result: {len(loot_items)} items found")
-    
-    def test_obstacle_detection(self):
-        """Test obstacle detection"""
-        obstacles = find_obstacles(self.test_image)
-        
-        self.assertIsInstance(obstacles, list, "Obstacles should be a list")
-        
-        for obstacle in obstacles:
-            self.assertIn('center', obstacle, "Obstacle should have center coordinates")
-            self.assertIn('name', obstacle, "Obstacle should have a name")
-        
-        logging.info(f"Obstacle detection test result: {len(obstacles)} obstacles found")
-    
-    def test_player_class_inference(self):
-        """Test player class inference"""
-        player_class = infer_player_class(self.test_image)
-        
-        # Should return a string or None
-        if player_class is not None:
-            self.assertIsInstance(player_class, str, "Player class should be a string")
-            self.assertGreater(len(player_class), 0, "Player class should not be empty")
-        
-        logging.info(f"Player class inference test result: {player_class}")
-    
-    def test_inventory_full_detection(self):
-        """Test inventory full detection"""
-        is_full = inventory_is_full(self.test_image)
-        
-        self.assertIsInstance(is_full, bool, "Inventory full should be boolean")
-        
-        logging.info(f"Inventory full detection test result: {is_full}")
-    
-    def test_worst_item_slot_detection(self):
-        """Test worst item slot detection"""
-        worst_slot = find_worst_item_slot(self.test_image)
-        
-        # Should return an integer slot number or None
-        if worst_slot is not None:
-            self.assertIsInstance(worst_slot, int, "Worst slot should be an integer")
-            self.assertGreaterEqual(worst_slot, 0, "Slot number should be >= 0")
-        
-        logging.info(f"Worst item slot detection test result: {worst_slot}")
-    
-    def test_item_value_lookup(self):
-        """Test item value lookup"""
-        # Test with known items
-        test_items = ["Potion of Life", "Wooden Sword", "Unknown Item"]
-        
-        for item_name in test_items:
-            value = get_item_value(item_name)
-            
-            # Should return an integer value or -1 for unknown items
-            self.assertIsInstance(value, int, "Item value should be an integer")
-            
-            if value != -1:  # Known item
-                self.assertGreaterEqual(value, 0, "Item value should be >= 0")
-        
-        logging.info(f"Item value lookup test completed for {len(test_items)} items")
-    
-    def test_bullet_danger_assessment(self):
-        """Test bullet danger assessment"""
-        # Create test bullets
-        test_bullets = [
-            {'center': (960, 540)},  # At player center (dangerous)
-            {'center': (100, 100)},  # Far from player (safe)
-            {'center': (950, 530)},  # Close to player (dangerous)
-        ]
-        
-        for bullet in test_bullets:
-            is_dangerous = is_bullet_dangerous(bullet)
-            self.assertIsInstance(is_dangerous, bool, "Danger assessment should be boolean")
-            
-            logging.info(f"Bullet at {bullet['center']} - Dangerous: {is_dangerous}")
-    
-    def test_dodge_direction_calculation(self):
-        """Test dodge direction calculation"""
-        # Create test bullets at different positions
-        test_bullets = [
-            {'center': (960, 440)},  # Above player
-            {'center': (960, 640)},  # Below player
-            {'center': (860, 540)},  # Left of player
-            {'center': (1060, 540)}, # Right of player
-        ]
-        
-        valid_directions = ['up', 'down', 'left', 'right']
-        
-        for bullet in test_bullets:
-            direction = get_dodge_direction(bullet)
-            
-            self.assertIsInstance(direction, str, "Dodge direction should be a string")
-            self.assertIn(direction, valid_directions, f"Dodge direction should be one of {valid_directions}")
-            
-            logging.info(f"Bullet at {bullet['center']} - Dodge direction: {direction}")
-    
-    def test_asset_loader_functionality(self):
-        """Test asset loader functionality"""
-        # Test getting assets by category
-        enemy_assets = self.asset_loader.get_enemy_assets()
-        self.assertIsInstance(enemy_assets, list, "Enemy assets should be a list")
-        
-        projectile_assets = self.asset_loader.get_projectile_assets()
-        self.assertIsInstance(projectile_assets, list, "Projectile assets should be a list")
-        
-        terrain_assets = self.asset_loader.get_terrain_assets()
-        self.assertIsInstance(terrain_assets, list, "Terrain assets should be a list")
-        
-        logging.info(f"Asset loader test - Enemies: {len(enemy_assets)}, Projectiles: {len(projectile_assets)}, Terrain: {len(terrain_assets)}")
-    
-    def test_detection_pipeline_creation(self):
-        """Test detection pipeline creation"""
-        pipeline, matchers = self.asset_loader.create_detection_pipeline()
-        
-        self.assertIsInstance(pipeline, dict, "Pipeline should be a dictionary")
-        self.assertIsInstance(matchers, dict, "Matchers should be a dictionary")
-        
-        # Check that pipeline has expected categories
-        expected_categories = ['enemies', 'projectiles', 'dangerous_terrain', 'safe_terrain', 'ui_elements']
-        for category in expected_categories:
-            self.assertIn(category, pipeline, f"Pipeline should contain {category}")
-        
-        logging.info(f"Detection pipeline created with {len(pipeline)} categories and {len(matchers)} matchers")
-
-
-class TestVisionPerformance(unittest.TestCase):
-    """Performance tests for vision detection"""
-    
-    def setUp(self):
-        """Set up for performance tests"""
-        self.test_image = np.random.randint(0, 255, (1080, 1920, 3), dtype=np.uint8)
-        self.asset_loader = AssetLoader("assets")
-    
-    def test_detection_speed(self):
-        """Test detection speed for real-time performance"""
-        import time
-        
-        # Test HP detection speed
-        start_time = time.time()
-        for _ in range(10):
-            get_hp_percent(self.test_image)
-        hp_time = time.time() - start_time
-        
-        # Test enemy detection speed
-        start_time = time.time()
-        for _ in range(10):
-            find_enemies(self.test_image)
-        enemy_time = time.time() - start_time
-        
-        # Test bullet detection speed
-        start_time = time.time()
-        for _ in range(10):
-            find_bullets(self.test_image)
-        bullet_time = time.time() - start_time
-        
-        # All detections should complete within reasonable time (e.g., < 100ms per frame)
-        max_time_per_frame = 0.1  # 100ms
-        
-        self.assertLess(hp_time / 10, max_time_per_frame, f"HP detection too slow: {hp_time/10:.3f}s per frame")
-        self.assertLess(enemy_time / 10, max_time_per_frame, f"Enemy detection too slow: {enemy_time/10:.3f}s per frame")
-        self.assertLess(bullet_time / 10, max_time_per_frame, f"Bullet detection too slow: {bullet_time/10:.3f}s per frame")
-        
-        logging.info(f"Performance test - HP: {hp_time/10:.3f}s, Enemies: {enemy_time/10:.3f}s, Bullets: {bullet_time/10:.3f}s per frame")
+from vision.asset_loader import get_loader, frame_signature, AssetLoader, _FrameStats
+from tests.logging_setup import get_test_logger, flush_test_log
+
+log = get_test_logger()
+
+TEST_IMAGES_DIR = Path("tests/test_images")
+
+
+def create_test_image(test_image_path):
+    """Create a test image for testing if none exists"""
+    if not test_image_path.exists():
+        # Create a synthetic test image (1920x1080)
+        test_image = np.zeros((1080, 1920, 3), dtype=np.uint8)
+
+        # Add a red HP bar at the bottom left
+        cv2.rectangle(test_image, (50, 900), (250, 920), (0, 0, 255), -1)
+
+        # Add some colored rectangles to simulate enemies
+        cv2.rectangle(test_image, (500, 300), (550, 350), (0, 0, 255), -1)  # Red enemy
+        cv2.rectangle(test_image, (800, 400), (850, 450), (0, 0, 255), -1)  # Another red enemy
+
+        # Add blue circles to simulate bullets
+        cv2.circle(test_image, (600, 500), 5, (255, 0, 0), -1)
+        cv2.circle(test_image, (700, 600), 5, (255, 0, 0), -1)
+
+        # Add yellow rectangles to simulate loot
+        cv2.rectangle(test_image, (300, 600), (350, 650), (0, 255, 255), -1)
+
+        cv2.imwrite(str(test_image_path), test_image)
+        logging.info(f"Created test image: {test_image_path}")
+
+
+# Shared inputs, built once per process and used by both the pytest fixtures
+# and the unittest classes
+
+@functools.lru_cache(maxsize=None)
+def _shared_asset_loader():
+    """The process-wide asset loader, already built by vision.detection on import"""
+    return get_loader("assets")
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_test_image():
+    """Decode the test screen once; tests only read it, so share it read-only"""
+    TEST_IMAGES_DIR.mkdir(exist_ok=True)
+    test_image_path = TEST_IMAGES_DIR / "test_screen.png"
+    create_test_image(test_image_path)
+
+    test_image = cv2.imread(str(test_image_path))
+    assert test_image is not None, "Test image should be loaded"
+    test_image.flags.writeable = False
+    return test_image
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_perf_frames():
+    """Two distinct random frames, alternated so the matchers' repeated-frame shortcut is not what gets timed"""
+    frames = [np.random.randint(0, 255, (1080, 1920, 3), dtype=np.uint8) for _ in range(2)]
+    for frame in frames:
+        frame.flags.writeable = False
+    return frames
+
+
+_FIXTURE_BUILDERS = {
+    'asset_loader': _shared_asset_loader,
+    'test_image': _shared_test_image,
+    'perf_frames': _shared_perf_frames,
+}
+
+
+@pytest.fixture(scope="session")
+def asset_loader():
+    return _shared_asset_loader()
+
+
+@pytest.fixture(scope="session")
+def test_image():
+    return _shared_test_image()
+
+
+@pytest.fixture(scope="session")
+def perf_frames():
+    return _shared_perf_frames()
+
+
+# Detection tests
+
+def test_capture_screen():
+    """Test screen capture functionality"""
+    try:
+        frame = capture_screen()
+    except Exception as e:
+        pytest.skip(f"Screen capture not available: {e}")
+
+    assert frame is not None, "Screen capture should return a frame"
+    assert len(frame.shape) == 3, "Frame should be 3D (height, width, channels)"
+    assert frame.shape[2] == 3, "Frame should have 3 color channels (BGR)"
+
+
+def test_hp_detection(test_image):
+    """Test HP bar detection"""
+    hp_percent = get_hp_percent(test_image)
+
+    # HP detection should return a value between 0 and 100, or None
+    if hp_percent is not None:
+        assert isinstance(hp_percent, (int, float)), "HP should be numeric"
+        assert hp_percent >= 0, "HP should be >= 0"
+        assert hp_percent <= 100, "HP should be <= 100"
+
+    logging.info(f"HP Detection test result: {hp_percent}%")
+
+
+def test_hp_region_reloaded_when_config_changes(test_image, tmp_path, monkeypatch):
+    """Test a HP bar region saved to the user config is used by the next get_hp_percent call"""
+    from config import settings
+    from vision import detection
+
+    config_file = tmp_path / "user_config.json"
+    config_file.write_text(json.dumps({'hp_bar_region': {'x': 10, 'y': 20, 'width': 100, 'height': 10}}))
+    monkeypatch.setattr(settings, 'CONFIG_FILE', str(config_file))
+    monkeypatch.setattr(detection, 'calibration_data', {})
+    try:
+        detection.reload_hp_config()
+        assert detection._hp_box == (10, 20, 110, 30), "The HP bar region should come from the user config"
+
+        config_file.write_text(json.dumps({'hp_bar_region': {'x': 50, 'y': 900, 'width': 200, 'height': 20}}))
+        os.utime(config_file, ns=(0, detection._hp_config_mtime + 1))
+        monkeypatch.setattr(detection, '_hp_config_checked', time.monotonic())
+        get_hp_percent(test_image)
+        assert detection._hp_box == (10, 20, 110, 30), "The user config should not be re-checked within the poll interval"
+
+        monkeypatch.setattr(detection, '_hp_config_checked', time.monotonic() - detection.HP_CONFIG_POLL_INTERVAL)
+        get_hp_percent(test_image)
+        assert detection._hp_box == (50, 900, 250, 920), "A changed user config should be picked up"
+    finally:
+        monkeypatch.undo()
+        detection.reload_hp_config()
+
+
+def test_calibration_tool_detections_follow_calibration_reload(test_image, monkeypatch):
+    """Test the calibration tool recomputes a frame's detections after the calibration is reloaded"""
+    calibration_tool = pytest.importorskip("vision.calibration_tool")
+    from vision import detection
+
+    readings = iter([40.0, 75.0])
+    monkeypatch.setattr(calibration_tool, 'get_hp_percent', lambda frame: next(readings))
+    # The detection state only, without building the Tk window
+    tool = calibration_tool.VisionCalibrationTool.__new__(calibration_tool.VisionCalibrationTool)
+    tool.current_frame = test_image
+    tool._detection_frame = None
+    tool._detection_version = None
+    tool._detection_cache = {}
+
+    assert tool.get_detections('hp') == 40.0
+    assert tool.get_detections('hp') == 40.0, "The same frame should reuse its cached reading"
+    detection.reload_calibration()
+    assert tool.get_detections('hp') == 75.0, "A calibration reload should invalidate the cached reading"
+
+
+def test_enemy_detection(test_image):
+    """Test enemy detection"""
+    enemies = find_enemies(test_image)
+
+    assert isinstance(enemies, list), "Enemies should be a list"
+
+    for enemy in enemies:
+        assert 'center' in enemy, "Enemy should have center coordinates"
+        assert 'distance' in enemy, "Enemy should have distance"
+        assert 'name' in enemy, "Enemy should have a name"
+
+        center = enemy['center']
+        assert isinstance(center, tuple), "Center should be a tuple"
+        assert len(center) == 2, "Center should have 2 coordinates"
+
+        assert isinstance(enemy['distance'], (int, float)), "Distance should be numeric"
+        assert enemy['distance'] >= 0, "Distance should be >= 0"
+
+    logging.info(f"Enemy detection test result: {len(enemies)} enemies found")
+
+
+def test_bullet_detection(test_image):
+    """Test bullet/projectile detection"""
+    bullets = find_bullets(test_image)
+
+    assert isinstance(bullets, list), "Bullets should be a list"
+
+    for bullet in bullets:
+        assert 'center' in bullet, "Bullet should have center coordinates"
+        assert 'name' in bullet, "Bullet should have a name"
+
+        center = bullet['center']
+        assert isinstance(center, tuple), "Center should be a tuple"
+        assert len(center) == 2, "Center should have 2 coordinates"
+
+    logging.info(f"Bullet detection test result: {len(bullets)} bullets found")
+
+
+def test_loot_detection(test_image):
+    """Test loot detection"""
+    loot_items = find_loot(test_image)
+
+    assert isinstance(loot_items, list), "Loot items should be a list"
+
+    for item in loot_items:
+        assert 'center' in item, "Loot item should have center coordinates"
+        assert 'name' in item, "Loot item should have a name"
+
+        center = item['center']
+        assert isinstance(center, tuple), "Center should be a tuple"
+        assert len(center) == 2, "Center should have 2 coordinates"
+
+    logging.info(f"Loot detection test result: {len(loot_items)} items found")
+
+
+def test_obstacle_detection(test_image):
+    """Test obstacle detection"""
+    obstacles = find_obstacles(test_image)
+
+    assert isinstance(obstacles, list), "Obstacles should be a list"
+
+    for obstacle in obstacles:
+        assert 'center' in obstacle, "Obstacle should have center coordinates"
+        assert 'name' in obstacle, "Obstacle should have a name"
+
+    logging.info(f"Obstacle detection test result: {len(obstacles)} obstacles found")
+
+
+def test_player_class_inference(test_image):
+    """Test player class inference"""
+    player_class = infer_player_class(test_image)
+
+    # Should return a string or None
+    if player_class is not None:
+        assert isinstance(player_class, str), "Player class should be a string"
+        assert len(player_class) > 0, "Player class should not be empty"
+
+    logging.info(f"Player class inference test result: {player_class}")
+
+
+def test_inventory_full_detection(test_image):
+    """Test inventory full detection"""
+    is_full = inventory_is_full(test_image)
+
+    assert isinstance(is_full, bool), "Inventory full should be boolean"
+
+    logging.info(f"Inventory full detection test result: {is_full}")
+
+
+def test_worst_item_slot_detection(test_image):
+    """Test worst item slot detection"""
+    worst_slot = find_worst_item_slot(test_image)
+
+    # Should return an integer slot number or None
+    if worst_slot is not None:
+        assert isinstance(worst_slot, int), "Worst slot should be an integer"
+        assert worst_slot >= 0, "Slot number should be >= 0"
+
+    logging.info(f"Worst item slot detection test result: {worst_slot}")
+
+
+def test_item_value_lookup():
+    """Test item value lookup"""
+    # Test with known items
+    test_items = ["Potion of Life", "Wooden Sword", "Unknown Item"]
+
+    for item_name in test_items:
+        value = get_item_value(item_name)
+
+        # Should return an integer value or -1 for unknown items
+        assert isinstance(value, int), "Item value should be an integer"
+
+        if value != -1:  # Known item
+            assert value >= 0, "Item value should be >= 0"
+
+    logging.info(f"Item value lookup test completed for {len(test_items)} items")
+
+
+def test_bullet_danger_assessment():
+    """Test bullet danger assessment"""
+    # Create test bullets
+    test_bullets = [
+        {'center': (960, 540)},  # At player center (dangerous)
+        {'center': (100, 100)},  # Far from player (safe)
+        {'center': (950, 530)},  # Close to player (dangerous)
+    ]
+
+    for bullet in test_bullets:
+        is_dangerous = is_bullet_dangerous(bullet)
+        assert isinstance(is_dangerous, bool), "Danger assessment should be boolean"
+
+        logging.info(f"Bullet at {bullet['center']} - Dangerous: {is_dangerous}")
+
+
+def test_enemy_detection_array(test_image):
+    """Test enemy detection as a structured array"""
+    enemies = find_enemies_array(test_image)
+
+    assert isinstance(enemies, DetectionArray), "Enemies should be a DetectionArray"
+    assert enemies.centers.shape == (len(enemies), 2), "Centers should be an (N, 2) array"
+
+    for cx, cy, w, h, name_id in enemies.data.tolist():
+        assert w > 0, "Detection width should be > 0"
+        assert h > 0, "Detection height should be > 0"
+        assert name_id < len(enemies.names), "Name id should index the names list"
+
+    logging.info(f"Enemy array detection test result: {len(enemies)} enemies found")
+
+
+def test_bullet_array_danger_and_dodge():
+    """Test vectorized danger assessment and dodge directions on a DetectionArray"""
+    boxes = np.array([[950, 530, 20, 20], [90, 90, 20, 20], [950, 430, 20, 20]], dtype=np.int32)
+    bullets = DetectionArray.from_matches({'bullet': boxes})
+
+    dangerous = is_bullet_dangerous(bullets)
+    directions = get_dodge_direction(bullets)
+
+    assert len(dangerous) == len(bullets), "Danger mask should have one entry per bullet"
+    assert dangerous.dtype == bool, "Danger mask should be boolean"
+
+    # The array forms should agree with the per-bullet forms
+    for i, bullet in enumerate(bullets.to_dicts()):
+        assert bool(dangerous[i]) == is_bullet_dangerous(bullet)
+        assert str(directions[i]) == get_dodge_direction(bullet)
+
+    # A plain list of bullets takes the same vectorized path
+    assert is_bullet_dangerous(bullets.to_dicts()).tolist() == dangerous.tolist()
+    assert get_dodge_direction(bullets.to_dicts()).tolist() == directions.tolist()
+    assert len(is_bullet_dangerous([])) == 0, "An empty list should give an empty mask"
+
+
+def test_dodge_direction_calculation():
+    """Test dodge direction calculation"""
+    # Create test bullets at different positions
+    test_bullets = [
+        {'center': (960, 440)},  # Above player
+        {'center': (960, 640)},  # Below player
+        {'center': (860, 540)},  # Left of player
+        {'center': (1060, 540)}, # Right of player
+    ]
+
+    valid_directions = ['up', 'down', 'left', 'right']
+
+    for bullet in test_bullets:
+        direction = get_dodge_direction(bullet)
+
+        assert isinstance(direction, str), "Dodge direction should be a string"
+        assert direction in valid_directions, f"Dodge direction should be one of {valid_directions}"
+
+        logging.info(f"Bullet at {bullet['center']} - Dodge direction: {direction}")
+
+
+def test_asset_loader_functionality(asset_loader):
+    """Test asset loader functionality"""
+    # Test getting assets by category
+    enemy_assets = asset_loader.get_enemy_assets()
+    assert isinstance(enemy_assets, list), "Enemy assets should be a list"
+
+    projectile_assets = asset_loader.get_projectile_assets()
+    assert isinstance(projectile_assets, list), "Projectile assets should be a list"
+
+    terrain_assets = asset_loader.get_terrain_assets()
+    assert isinstance(terrain_assets, list), "Terrain assets should be a list"
+
+    logging.info(f"Asset loader test - Enemies: {len(enemy_assets)}, Projectiles: {len(projectile_assets)}, Terrain: {len(terrain_assets)}")
+
+
+def test_detection_pipeline_creation(asset_loader):
+    """Test detection pipeline creation"""
+    pipeline, matchers = asset_loader.create_detection_pipeline()
+
+    assert isinstance(pipeline, dict), "Pipeline should be a dictionary"
+    assert isinstance(matchers, dict), "Matchers should be a dictionary"
+
+    # Check that pipeline has expected categories
+    expected_categories = ['enemies', 'projectiles', 'dangerous_terrain', 'safe_terrain', 'ui_elements']
+    for category in expected_categories:
+        assert category in pipeline, f"Pipeline should contain {category}"
+
+    logging.info(f"Detection pipeline created with {len(pipeline)} categories and {len(matchers)} matchers")
+
+
+def test_sprite_atlas_round_trip(tmp_path):
+    """Test sprites served from a built atlas match their PNGs, and a replaced PNG is not served stale"""
+    rng = np.random.default_rng(0)
+    assets = []
+    for i, (h, w) in enumerate([(8, 8), (16, 12), (24, 30)]):
+        path = f"enemies/sprite_{i}.png"
+        (tmp_path / "enemies").mkdir(exist_ok=True)
+        cv2.imwrite(str(tmp_path / path), rng.integers(0, 256, (h, w, 3), dtype=np.uint8))
+        assets.append({'name': f"sprite_{i}", 'path': path, 'type': 'png', 'size': h * w})
+    (tmp_path / "asset_index.json").write_text(json.dumps({'enemies': assets}))
+
+    assert AssetLoader(str(tmp_path)).build_atlas() is not None, "The atlas should be built"
+    loader = AssetLoader(str(tmp_path))
+    assert len(loader._atlas_index) == len(assets), "Every sprite should be served from the atlas"
+    for asset in assets:
+        image, _ = loader._decode_image(asset['path'])
+        assert np.array_equal(image, cv2.imread(str(tmp_path / asset['path']))), \
+            f"{asset['path']} from the atlas should match its PNG"
+
+    # Replace one sprite without rebuilding the atlas
+    replaced = assets[1]['path']
+    cv2.imwrite(str(tmp_path / replaced), np.full((20, 10, 3), 77, dtype=np.uint8))
+    loader = AssetLoader(str(tmp_path))
+    assert replaced not in loader._atlas_index, "A replaced sprite should not be served from the atlas"
+    image, _ = loader._decode_image(replaced)
+    assert np.array_equal(image, cv2.imread(str(tmp_path / replaced))), "A replaced sprite should load from its PNG"
+
+
+def test_color_prefilter_skips_absent_colours(tmp_path, monkeypatch):
+    """Test the colour prefilter skips templates whose colours are not on screen, and still finds every planted one"""
+    rng = np.random.default_rng(0)
+    hues = {'green_sprite': (60, (12, 12)), 'blue_sprite': (120, (14, 10)), 'yellow_sprite': (30, (16, 16))}
+    sprites, assets = {}, []
+    (tmp_path / "enemies").mkdir()
+    for name, (hue, (h, w)) in hues.items():
+        # One saturated hue, textured in brightness so the sprite has a distinct match peak
+        hsv = np.dstack([np.full((h, w), hue), np.full((h, w), 255),
+                         rng.integers(80, 256, (h, w))]).astype(np.uint8)
+        sprites[name] = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+        path = f"enemies/{name}.png"
+        cv2.imwrite(str(tmp_path / path), sprites[name])
+        assets.append({'name': name, 'path': path, 'type': 'png', 'size': h * w})
+    (tmp_path / "asset_index.json").write_text(json.dumps({'enemies': assets}))
+
+    # Grey frame with the green and blue sprites planted twice each; no yellow anywhere
+    positions = {'green_sprite': [(30, 40), (200, 120)], 'blue_sprite': [(120, 20), (60, 150)]}
+    frame = np.full((200, 300, 3), 128, dtype=np.uint8)
+    for name, points in positions.items():
+        h, w = sprites[name].shape[:2]
+        for x, y in points:
+            frame[y:y + h, x:x + w] = sprites[name]
+
+    # Record which template shapes get matched against the frame
+    loader = AssetLoader(str(tmp_path))
+    matched_shapes = []
+    create_template_matcher = loader.create_template_matcher
+    def recording_template_matcher(template, threshold=0.8):
+        match = create_template_matcher(template, threshold)
+        return lambda *args: matched_shapes.append(template.shape[:2]) or match(*args)
+    monkeypatch.setattr(loader, 'create_template_matcher', recording_template_matcher)
+
+    results = loader.create_multi_template_matcher(assets)(frame)
+
+    assert sprites['yellow_sprite'].shape[:2] not in matched_shapes, "A template with absent colours should be skipped"
+    assert sorted(matched_shapes) == sorted(sprites[name].shape[:2] for name in positions), \
+        "Templates with colours on screen should be matched"
+    assert results.keys() == positions.keys(), "Only the planted sprites should be found"
+    for name, points in positions.items():
+        assert sorted(map(tuple, results[name][:, :2].tolist())) == sorted(points), \
+            f"Every planted {name} should be found"
+
+
+def test_matcher_reuses_results_for_repeated_frame(test_image):
+    """Test a repeated frame is answered from the memo, with read-only result arrays"""
+    signature = frame_signature(test_image)
+    first = matchers['enemies'](test_image, signature)
+    again = matchers['enemies'](test_image)
+
+    assert again.keys() == first.keys(), "A repeated frame should give the same matches"
+    assert first, "The test screen should have enemy matches"
+    for name, matches in again.items():
+        assert matches is first[name], "A repeated frame should reuse the previous arrays"
+        assert not matches.flags.writeable, "Shared result arrays should be read-only"
+
+
+def test_frame_stats_match_equals_ccoeff_normed(test_image):
+    """Test the shared-norm TM_CCORR matcher scores like cv2's TM_CCOEFF_NORMED, over the frame and a region"""
+    rng = np.random.default_rng(0)
+    frame = cv2.cvtColor(test_image, cv2.COLOR_BGR2GRAY)
+    # Textured, smooth and flat areas side by side
+    frame[100:400, 1000:1400] = rng.integers(0, 256, (300, 400), dtype=np.uint8)
+    frame[100:400, 1400:1800] = cv2.GaussianBlur(rng.integers(0, 256, (300, 400), dtype=np.uint8), (9, 9), 0)
+    frame_stats = _FrameStats(frame)
+
+    for h, w in ((16, 14), (36, 36), (82, 34)):
+        template = np.ascontiguousarray(frame[150:150 + h, 1380:1380 + w])
+        zero_mean, inv_norm = AssetLoader._zero_mean_template(template)
+        expected = cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
+
+        np.testing.assert_allclose(frame_stats.match(zero_mean, inv_norm), expected, atol=5e-3)
+        x0, y0, x1, y1 = 900, 50, 1600, 450
+        np.testing.assert_allclose(frame_stats.match(zero_mean, inv_norm, (x0, y0, x1, y1)),
+                                   expected[y0:y1 - h + 1, x0:x1 - w + 1], atol=5e-3)
+
+
+def test_frame_stats_shared_across_threads(test_image, monkeypatch):
+    """Test worker threads sharing one frame's stats build each window norm map once"""
+    frame_stats = _FrameStats(cv2.cvtColor(test_image, cv2.COLOR_BGR2GRAY)).prepare(1)
+    built = []
+    build = frame_stats._inv_std
+    monkeypatch.setattr(frame_stats, '_inv_std', lambda h, w: built.append((h, w)) or build(h, w))
+
+    shapes = [(16, 14), (36, 36)] * 8
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        maps = list(executor.map(lambda shape: frame_stats.inv_std(*shape), shapes))
+
+    assert sorted(built) == [(16, 14), (36, 36)], "Each shape's norm map should be built once"
+    assert all(m is maps[i % 2] for i, m in enumerate(maps)), "Threads should share the built maps"
+
+
+def _planted_sprite(asset_loader, name, frame_shape=(200, 300), background=128, positions=((80, 50),)):
+    """A named enemy sprite, and a flat frame with it pasted at each (x, y) position"""
+    asset = asset_loader.find_asset_by_name(name, 'enemies')
+    if asset is None:
+        pytest.skip(f"Sprite {name} not in the asset index")
+    sprite = asset_loader.load_image_asset(asset['path'])
+    h, w = sprite.shape[:2]
+    frame = np.full((*frame_shape, 3), background, dtype=np.uint8)
+    for x, y in positions:
+        frame[y:y + h, x:x + w] = sprite
+    return sprite, frame
+
+
+def test_template_matcher_single_sprite(asset_loader):
+    """Test one sprite in a flat frame yields exactly one match, not one per tied score peak"""
+    sprite, frame = _planted_sprite(asset_loader, 'resources_sprite_1058')
+    matches = asset_loader.create_template_matcher(sprite)(frame)
+
+    assert matches.tolist() == [[80, 50, sprite.shape[1], sprite.shape[0]]], "Expected exactly one match at the sprite"
+
+
+@pytest.mark.parametrize("name", ['resources_sprite_1266', 'resources_sprite_1328', 'resources_sprite_1243',
+                                  'resources_sprite_1317'])
+def test_template_matcher_pyramid_matches_full_frame(asset_loader, test_image, monkeypatch, name):
+    """Test the coarse-to-fine search finds the same peaks as a full-frame search for sprites of 32px or more"""
+    positions = ((40, 30), (300, 60), (90, 250), (420, 280))
+    sprite, flat_frame = _planted_sprite(asset_loader, name, frame_shape=(400, 600), positions=positions)
+    assert min(sprite.shape[:2]) >= 32, "Sprite should be large enough for the pyramid search"
+    # The test screen's flat rectangles give tied score plateaus, which both searches must break alike
+    screen_frame = test_image.copy()
+    h, w = sprite.shape[:2]
+    for x, y in positions:
+        screen_frame[y:y + h, x:x + w] = sprite
+
+    for frame in (flat_frame, screen_frame):
+        pyramid_matches = asset_loader.create_template_matcher(sprite)(frame)
+        with monkeypatch.context() as patch:
+            patch.setattr(asset_loader, 'PYRAMID_LEVELS', 0)
+            full_frame_matches = asset_loader.create_template_matcher(sprite)(frame)
+
+        assert sorted(map(tuple, pyramid_matches.tolist())) == sorted(map(tuple, full_frame_matches.tolist())), \
+            "Pyramid and full-frame searches should find the same peaks"
+    assert set(positions) <= {tuple(m) for m in full_frame_matches[:, :2].tolist()}, \
+        "Every planted sprite should be found"
+
+
+# Performance tests
+
+def _median_seconds(detector, frames, runs=10):
+    """Median wall time of one detector call, after an untimed warm-up call"""
+    detector(frames[-1])
+    times = []
+    for i in range(runs):
+        frame = frames[i % len(frames)]
+        start_ns = time.perf_counter_ns()
+        detector(frame)
+        times.append(time.perf_counter_ns() - start_ns)
+    return statistics.median(times) / 1e9
+
+
+@pytest.mark.slow
+def test_detection_speed(perf_frames):
+    """Test detection speed for real-time performance"""
+    hp_time = _median_seconds(get_hp_percent, perf_frames)
+    enemy_time = _median_seconds(find_enemies, perf_frames)
+    bullet_time = _median_seconds(find_bullets, perf_frames)
+
+    # All detections should complete within reasonable time (e.g., < 100ms per frame)
+    max_time_per_frame = 0.1  # 100ms
+
+    assert hp_time < max_time_per_frame, f"HP detection too slow: {hp_time:.3f}s per frame"
+    assert enemy_time < max_time_per_frame, f"Enemy detection too slow: {enemy_time:.3f}s per frame"
+    assert bullet_time < max_time_per_frame, f"Bullet detection too slow: {bullet_time:.3f}s per frame"
+
+    logging.info(f"Performance test - HP: {hp_time:.3f}s, Enemies: {enemy_time:.3f}s, Bullets: {bullet_time:.3f}s per frame")
+
+
+# unittest compatibility layer
+
+def _unittest_case(name, tests):
+    """Wrap pytest-style test functions in a unittest.TestCase, supplying their fixtures by name"""
+    def as_method(test):
+        def method(self):
+            try:
+                test(**{arg: _FIXTURE_BUILDERS[arg]() for arg in inspect.signature(test).parameters})
+            except pytest.skip.Exception as e:
+                self.skipTest(str(e))
+        method.__doc__ = test.__doc__
+        return method
+
+    attrs = {test.__name__: as_method(test) for test in tests}
+    attrs['__test__'] = False  # pytest already collects the functions themselves
+    attrs['__module__'] = __name__
+    return type(name, (unittest.TestCase,), attrs)
+
+
+# Tests needing pytest-only fixtures (tmp_path, monkeypatch) or parametrization run under pytest alone
+TestVisionDetection = _unittest_case("TestVisionDetection", [
+    test_capture_screen, test_hp_detection, test_enemy_detection, test_bullet_detection,
+    test_loot_detection, test_obstacle_detection, test_player_class_inference,
+    test_inventory_full_detection, test_worst_item_slot_detection, test_item_value_lookup,
+    test_bullet_danger_assessment, test_enemy_detection_array, test_bullet_array_danger_and_dodge,
+    test_dodge_direction_calculation, test_asset_loader_functionality, test_detection_pipeline_creation,
+    test_matcher_reuses_results_for_repeated_frame, test_frame_stats_match_equals_ccoeff_normed,
+    test_template_matcher_single_sprite,
+])
+TestVisionPerformance = _unittest_case("TestVisionPerformance", [test_detection_speed])
 
 
 def run_vision_tests():
     """Run all vision detection tests"""
-    # Create test suite
-    test_suite = unittest.TestSuite()
-    
-    # Add test cases
-    test_suite.addTest(unittest.makeSuite(TestVisionDetection))
-    test_suite.addTest(unittest.makeSuite(TestVisionPerformance))
-    
-    # Run tests
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(test_suite)
-    
-    # Print summary
-    print(f"\n{'='*50}")
-    print(f"Vision Detection Test Results:")
-    print(f"Tests run: {result.testsRun}")
-    print(f"Failures: {len(result.failures)}")
-    print(f"Errors: {len(result.errors)}")
-    print(f"Success rate: {((result.testsRun - len(result.failures) - len(result.errors)) / result.testsRun * 100):.1f}%")
-    print(f"{'='*50}")
-    
-    return result.wasSuccessful()
+    exit_code = pytest.main([__file__, "-v"])
+
+    log.info(f"\n{'='*50}")
+    log.info(f"Vision Detection Test Results: {'PASS' if exit_code == 0 else 'FAIL'}")
+    log.info(f"{'='*50}")
+    flush_test_log()
+
+    return exit_code == 0
 
 
 if __name__ == "__main__":
     success = run_vision_tests()
-    sys.exit(0 if success else 1) 
\ No newline at end of file
+    sys.exit(0 if success else 1)
@@ -5,28 +5,326 @@ Loads and manages extracted game assets for OpenCV-based detection
 """
 
 import os
+import sys
 import json
+import zlib
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import numpy as np
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 import logging
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # Fall back to the stdlib json parser
+
 logger = logging.getLogger(__name__)
 
+# Make sure OpenCV uses its SIMD-dispatched kernels (cvtColor, matchTemplate, ...);
+# an earlier cv2.setUseOptimized(False) elsewhere in the process would otherwise stick
+cv2.setUseOptimized(True)
+if not cv2.useOptimized():
+    logger.warning("OpenCV was built without optimized code paths; detection will be slower")
+
+# Shared empty (x, y, width, height) result for templates without matches
+_NO_MATCHES = np.empty((0, 4), dtype=np.int32)
+_NO_MATCHES.flags.writeable = False
+
+
+@functools.lru_cache(maxsize=1)
+def _get_match_executor() -> ThreadPoolExecutor:
+    """Shared worker pool for template matching (cv2.matchTemplate releases the GIL)"""
+    return ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="template-match")
+
+
+def _merge_boxes(boxes: List[List[int]]) -> List[Tuple[int, int, int, int]]:
+    """Merge overlapping (x0, y0, x1, y1) boxes so no region is searched twice"""
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for box in sorted(boxes):
+            for other in result:
+                if box[0] <= other[2] and other[0] <= box[2] and box[1] <= other[3] and other[1] <= box[3]:
+                    other[0], other[1] = min(other[0], box[0]), min(other[1], box[1])
+                    other[2], other[3] = max(other[2], box[2]), max(other[3], box[3])
+                    merged = True
+                    break
+            else:
+                result.append(list(box))
+        boxes = result
+    return [tuple(box) for box in boxes]
+
+
+def _suppress_overlapping(xs: np.ndarray, ys: np.ndarray, scores: np.ndarray, w: int, h: int) -> np.ndarray:
+    """
+    Greedy non-maximum suppression of score peaks: best score first, dropping every other
+    peak whose w x h box overlaps a kept one. Returns the kept indices in input order.
+    """
+    # Highest score first; ties go to the topmost, then leftmost peak
+    order = np.lexsort((xs, ys, -scores))
+    suppressed = np.zeros(len(xs), dtype=bool)
+    keep = []
+    for i in order:
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        suppressed |= (np.abs(xs - xs[i]) < w) & (np.abs(ys - ys[i]) < h)
+    return np.sort(np.array(keep, dtype=np.intp))
+
+
+# Coarse HSV histogram used to rule out templates whose colours are absent from a frame
+_HSV_BINS = (18, 16, 16)
+_HSV_RANGES = (180, 256, 256)
+_HSV_BIN_WIDTHS = tuple(r // b for r, b in zip(_HSV_RANGES, _HSV_BINS))
+
+
+def _hsv_bin_table(image_bgr: np.ndarray) -> np.ndarray:
+    """Return a summed-volume table of the image's HSV histogram for O(1) range counts"""
+    hsv = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2HSV)
+    hist = cv2.calcHist([hsv], [0, 1, 2], None, list(_HSV_BINS), [0, 180, 0, 256, 0, 256])
+    table = np.zeros(tuple(b + 1 for b in _HSV_BINS), dtype=np.float64)
+    table[1:, 1:, 1:] = hist.cumsum(0).cumsum(1).cumsum(2)
+    return table
+
+
+def _count_in_bins(table: np.ndarray, lo: Tuple[int, int, int], hi: Tuple[int, int, int]) -> float:
+    """Count pixels whose HSV bin lies within [lo, hi] (inclusive) using a summed-volume table"""
+    (h0, s0, v0), (h1, s1, v1) = lo, (hi[0] + 1, hi[1] + 1, hi[2] + 1)
+    return (table[h1, s1, v1] - table[h0, s1, v1] - table[h1, s0, v1] - table[h1, s1, v0]
+            + table[h0, s0, v1] + table[h0, s1, v0] + table[h1, s0, v0] - table[h0, s0, v0])
+
+
+class _FrameStats:
+    """
+    Per-frame data shared by every template matched against one grayscale frame:
+    the float32 frame, its integral images, and the coarse pyramid frames.
+    Lazily computed under a lock, so worker threads sharing one frame build each value once;
+    call prepare() before fanning out to build the frame-wide values up front.
+    """
+    
+    # Windows whose pixel variance sum is below this are flat (integer pixels make any
+    # non-flat window's sum at least (n - 1) / n), and score 0 like TM_CCOEFF_NORMED does
+    FLAT_WINDOW_VARIANCE = 0.25
+    
+    # Full-frame window norm maps kept, keyed by template shape; each is 4 bytes per pixel,
+    # so only a few are kept and templates of one shape should be matched together
+    INV_STD_CACHE_SIZE = 4
+    
+    def __init__(self, gray: np.ndarray):
+        self.gray = gray
+        self._image = None
+        self._sums = None
+        self._coarse = {}
+        self._inv_std_cache = OrderedDict()
+        # Guards the lazy values; a window norm map is built under its own shape's lock
+        # so templates of other shapes are not held up meanwhile
+        self._lock = threading.RLock()
+        self._inv_std_locks: Dict[Tuple[int, int], threading.Lock] = {}
+    
+    def prepare(self, levels: int = 0) -> '_FrameStats':
+        """Build the float frame and integral images, and those of `levels` coarse frames"""
+        self._integrals()
+        for level in range(1, levels + 1):
+            self.coarse(level)._integrals()
+        return self
+    
+    @property
+    def image(self) -> np.ndarray:
+        if self._image is None:
+            with self._lock:
+                if self._image is None:
+                    self._image = self.gray.astype(np.float32)
+        return self._image
+    
+    def _integrals(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Integral images of the pixels and of their squares"""
+        if self._sums is None:
+            with self._lock:
+                if self._sums is None:
+                    self._sums = cv2.integral2(self.image, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+        return self._sums
+    
+    def coarse(self, levels: int) -> '_FrameStats':
+        """Stats of the frame pyrDown'd `levels` times"""
+        with self._lock:
+            stats = self._coarse.get(levels)
+            if stats is None:
+                coarse = self.gray
+                for _ in range(levels):
+                    coarse = cv2.pyrDown(coarse)
+                stats = self._coarse[levels] = _FrameStats(coarse)
+        return stats
+    
+    def inv_std(self, h: int, w: int) -> np.ndarray:
+        """Cached _inv_std over the whole frame"""
+        key = (h, w)
+        with self._lock:
+            inv_std = self._inv_std_cache.get(key)
+            if inv_std is not None:
+                self._inv_std_cache.move_to_end(key)
+                return inv_std
+            shape_lock = self._inv_std_locks.setdefault(key, threading.Lock())
+        
+        with shape_lock:
+            with self._lock:
+                inv_std = self._inv_std_cache.get(key)
+            if inv_std is None:
+                inv_std = self._inv_std(h, w)
+                with self._lock:
+                    self._inv_std_cache[key] = inv_std
+                    while len(self._inv_std_cache) > self.INV_STD_CACHE_SIZE:
+                        self._inv_std_cache.popitem(last=False)
+        return inv_std
+    
+    def _inv_std(self, h: int, w: int, roi: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        """1 / sqrt(sum of squared deviations) of every h x w window whose top-left lies in roi (x0, y0, x1, y1)"""
+        sums, sq_sums = self._integrals()
+        x0, y0, x1, y1 = roi if roi is not None else (0, 0, self.gray.shape[1] - w + 1, self.gray.shape[0] - h + 1)
+        
+        # cv2 arithmetic rather than numpy: this runs once per template shape over the whole frame
+        def window(table):
+            return cv2.subtract(cv2.subtract(table[y0 + h:y1 + h, x0 + w:x1 + w], table[y0:y1, x0 + w:x1 + w]),
+                                cv2.subtract(table[y0 + h:y1 + h, x0:x1], table[y0:y1, x0:x1]))
+        
+        window_sums = window(sums)
+        variance = cv2.subtract(window(sq_sums), cv2.multiply(window_sums, window_sums, scale=1.0 / (h * w)),
+                                dtype=cv2.CV_32F)
+        # Flat windows become 0 -> inf -> 0; every other window's inverse is at most 1 / sqrt(FLAT_WINDOW_VARIANCE)
+        _, variance = cv2.threshold(variance, self.FLAT_WINDOW_VARIANCE, 0, cv2.THRESH_TOZERO)
+        _, inv_std = cv2.threshold(cv2.pow(variance, -0.5), self.FLAT_WINDOW_VARIANCE ** -0.5, 0, cv2.THRESH_TOZERO_INV)
+        return inv_std
+    
+    def match(self, template: np.ndarray, template_inv_norm: float,
+              roi: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        """
+        TM_CCOEFF_NORMED score map of a zero-mean float32 template over the frame (or roi,
+        given as (x0, y0, x1, y1) of the searched pixels). The template side is precomputed
+        and the window side comes from the shared integral images, so only a TM_CCORR runs per template.
+        """
+        h, w = template.shape[:2]
+        if roi is None:
+            scores = cv2.matchTemplate(self.image, template, cv2.TM_CCORR)
+            inv_std = self.inv_std(h, w)
+        else:
+            x0, y0, x1, y1 = roi
+            scores = cv2.matchTemplate(self.image[y0:y1, x0:x1], template, cv2.TM_CCORR)
+            inv_std = self._inv_std(h, w, (x0, y0, x0 + scores.shape[1], y0 + scores.shape[0]))
+        return cv2.multiply(scores, inv_std, scale=template_inv_norm)
+
+
+# Per-frame work shared by every category matcher run on the same frame, keyed on the
+# frame's (shape, crc32) signature: its HSV bin table and its _FrameStats, built on first use
+_frame_cache = {'signature': None}
+
+
+def _get_frame_cache(signature: Tuple) -> Dict[str, Any]:
+    """The shared cache entry for a frame signature, starting a new one when the frame changes"""
+    global _frame_cache
+    if _frame_cache['signature'] != signature:
+        _frame_cache = {'signature': signature}
+    return _frame_cache
+
+
+def _get_frame_stats(screen_image: np.ndarray, signature: Tuple) -> _FrameStats:
+    """_FrameStats for a frame (BGR or grayscale), reused while the same frame is matched"""
+    cache = _get_frame_cache(signature)
+    frame_stats = cache.get('stats')
+    if frame_stats is None:
+        if screen_image.ndim == 3:
+            screen_gray = cv2.cvtColor(screen_image, cv2.COLOR_BGR2GRAY)
+        else:
+            screen_gray = screen_image
+        frame_stats = cache['stats'] = _FrameStats(screen_gray)
+    return frame_stats
+
+
+def _get_hsv_bin_table(screen_image: np.ndarray, signature: Tuple) -> np.ndarray:
+    """_hsv_bin_table for a BGR frame, reused while the same frame is matched"""
+    cache = _get_frame_cache(signature)
+    table = cache.get('hsv_table')
+    if table is None:
+        table = cache['hsv_table'] = _hsv_bin_table(screen_image)
+    return table
+
+
+def frame_signature(screen_image: np.ndarray) -> Tuple:
+    """
+    Fingerprint of a frame's pixels, used to recognise a repeated frame. Hashing a 1080p
+    frame takes a few ms, so compute it once per frame and pass it to every matcher.
+    """
+    return screen_image.shape, zlib.crc32(np.ascontiguousarray(screen_image))
+
+
+def _read_json(path: Path) -> Any:
+    """Parse a JSON file into fresh objects owned by the calling loader"""
+    data = path.read_bytes()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 
 class AssetLoader:
     """Loads and manages game assets for bot use"""
     
+    # Maximum number of decoded images kept in memory
+    IMAGE_CACHE_SIZE = 2048
+    
+    # Image formats usable as templates, and the largest template side worth matching
+    IMAGE_TYPES = ('png', 'jpg', 'jpeg')
+    MAX_TEMPLATE_SIZE = 200
+    
+    # Asset name keywords for terrain that hurts, is safe to walk on, or blocks movement
+    DAMAGE_KEYWORDS = ('lava', 'spike', 'trap', 'danger', 'damage')
+    NAVIGATION_KEYWORDS = ('ground', 'floor', 'path', 'safe', 'walkable')
+    OBSTACLE_KEYWORDS = ('wall', 'rock', 'obstacle', 'lava')
+    
+    # Pyramid search: one halving, only for templates at least 32px per side (smaller
+    # pixel-art sprites lose too much detail), with the coarse pass run below the match threshold
+    PYRAMID_LEVELS = 1
+    PYRAMID_MIN_TEMPLATE_SIZE = 16
+    PYRAMID_COARSE_MARGIN = 0.2
+    
+    # Scores are compared for non-maximum suppression at this many decimals
+    NMS_SCORE_DECIMALS = 4
+    
+    # Colour pre-filter: a template is only matched when the frame holds at least this
+    # fraction of its pixel count inside the template's (widened) HSV range
+    COLOR_PREFILTER_MIN_FRACTION = 0.5
+    COLOR_PREFILTER_SLACK = (8, 40, 40)
+    
+    # Packed atlas of every matchable template (relative to the assets directory),
+    # memory-mapped so loading a template is a slice instead of a PNG decode
+    ATLAS_FILE = "metadata/atlas.npy"
+    ATLAS_INDEX_FILE = "metadata/atlas.json"
+    ATLAS_WIDTH = 2048
+    
     def __init__(self, assets_path: str = "assets"):
         self.assets_path = Path(assets_path)
         self.asset_index = {}
+        self._name_index: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._name_index_any: Dict[str, Dict[str, Any]] = {}
         self.loaded_assets = {}
         self.spritesheet_data = {}
         
+        # Decoded images keyed by asset path: (BGR image, grayscale image)
+        self._image_cache: "OrderedDict[str, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        
+        # Memory-mapped sprite atlas and asset path -> (x, y, width, height) within it
+        self._atlas: Optional[np.ndarray] = None
+        self._atlas_index: Dict[str, List[int]] = {}
+        
         # Load asset index
         self._load_asset_index()
         
+        # Load the packed sprite atlas, if one has been built
+        self._load_atlas()
+        
         # Load spritesheet data
         self._load_spritesheet_data()
         
@@ -39,11 +337,18 @@ class AssetLoader:
             return
             
         try:
-            with open(index_file, 'r') as f:
-                self.asset_index = json.load(f)
+            self.asset_index = _read_json(index_file)
             logger.info("Asset index loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load asset index: {e}")
+            return
+        
+        # Index assets by lowercase name; the first asset listed under a name wins
+        for cat, cat_assets in self.asset_index.items():
+            for asset in cat_assets:
+                name = asset['name'].lower()
+                self._name_index.setdefault((cat, name), asset)
+                self._name_index_any.setdefault(name, asset)
     
     def _load_spritesheet_data(self):
         """Load spritesheet metadata"""
@@ -54,35 +359,179 @@ class AssetLoader:
             return
             
         try:
-            with open(spritesheet_file, 'r') as f:
-                self.spritesheet_data = json.load(f)
+            self.spritesheet_data = _read_json(spritesheet_file)
             logger.info("Spritesheet data loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load spritesheet data: {e}")
     
+    def _load_atlas(self):
+        """Memory-map the packed sprite atlas if it exists and is not older than the asset index or its sprites"""
+        atlas_file = self.assets_path / self.ATLAS_FILE
+        atlas_index_file = self.assets_path / self.ATLAS_INDEX_FILE
+        index_file = self.assets_path / "asset_index.json"
+        
+        if not atlas_file.exists() or not atlas_index_file.exists():
+            return
+        
+        if index_file.exists() and atlas_index_file.stat().st_mtime_ns < index_file.stat().st_mtime_ns:
+            logger.warning(f"Sprite atlas at {atlas_file} is older than the asset index, loading PNGs instead")
+            return
+        
+        try:
+            self._atlas = np.load(str(atlas_file), mmap_mode='r')
+            atlas_index = _read_json(atlas_index_file)
+        except Exception as e:
+            logger.error(f"Failed to load sprite atlas: {e}")
+            self._atlas = None
+            self._atlas_index = {}
+            return
+        
+        # Serve a sprite from the atlas only while its PNG is the one that was packed;
+        # replaced sprites are decoded from their PNGs until the atlas is rebuilt
+        self._atlas_index = {}
+        stale = 0
+        for path, entry in atlas_index.items():
+            if len(entry) == 6 and list(entry[4:]) == self._file_stamp(self.assets_path / path):
+                self._atlas_index[path] = entry[:4]
+            else:
+                stale += 1
+        if stale:
+            logger.warning(f"{stale} sprites changed since the atlas at {atlas_file} was built, "
+                           f"loading their PNGs instead (rebuild with python -m vision.asset_loader --build-atlas)")
+        logger.info(f"Sprite atlas loaded with {len(self._atlas_index)} sprites")
+    
+    @staticmethod
+    def _file_stamp(path: Path) -> Optional[List[int]]:
+        """[mtime_ns, size] of a file, recorded per sprite in the atlas index; None if it is missing"""
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+    
+    def build_atlas(self) -> Optional[Path]:
+        """
+        Pack every matchable image asset into one atlas array saved next to the metadata.
+        Returns the atlas path, or None if there was nothing to pack.
+        """
+        sprites = []
+        for cat_assets in self.asset_index.values():
+            for asset in cat_assets:
+                if asset['type'] not in self.IMAGE_TYPES:
+                    continue
+                sprite_file = self.assets_path / asset['path']
+                stamp = self._file_stamp(sprite_file)
+                image = cv2.imread(str(sprite_file))
+                if stamp is None or image is None or max(image.shape[:2]) > self.MAX_TEMPLATE_SIZE:
+                    continue
+                sprites.append((asset['path'], image, stamp))
+        
+        if not sprites:
+            logger.warning("No image assets to pack into a sprite atlas")
+            return None
+        
+        # Shelf packing: tallest sprites first, left to right, a new shelf when a row is full
+        sprites.sort(key=lambda sprite: sprite[1].shape[0], reverse=True)
+        # path -> [x, y, width, height, mtime_ns, size]; the file stamp detects replaced PNGs
+        atlas_index = {}
+        x = y = shelf_height = 0
+        for path, image, stamp in sprites:
+            h, w = image.shape[:2]
+            if x + w > self.ATLAS_WIDTH:
+                x, y, shelf_height = 0, y + shelf_height, 0
+            atlas_index[path] = [x, y, w, h, *stamp]
+            x += w
+            shelf_height = max(shelf_height, h)
+        
+        atlas = np.zeros((y + shelf_height, self.ATLAS_WIDTH, 3), dtype=np.uint8)
+        for path, image, _ in sprites:
+            x, y, w, h = atlas_index[path][:4]
+            atlas[y:y + h, x:x + w] = image
+        
+        atlas_file = self.assets_path / self.ATLAS_FILE
+        atlas_file.parent.mkdir(parents=True, exist_ok=True)
+        np.save(str(atlas_file), atlas)
+        with open(self.assets_path / self.ATLAS_INDEX_FILE, 'w') as f:
+            json.dump(atlas_index, f)
+        
+        logger.info(f"Packed {len(sprites)} sprites into a {atlas.shape[1]}x{atlas.shape[0]} atlas at {atlas_file}")
+        self._image_cache.clear()
+        self._load_atlas()
+        return atlas_file
+    
     def get_assets_by_category(self, category: str) -> List[Dict[str, Any]]:
         """Get all assets in a specific category"""
         return self.asset_index.get(category, [])
     
-    def load_image_asset(self, asset_path: str) -> Optional[np.ndarray]:
-        """Load an image asset as OpenCV format"""
+    def _load_cached_image(self, asset_path: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Decode an image asset once and cache both its BGR and grayscale forms"""
+        cached = self._image_cache.get(asset_path)
+        if cached is not None:
+            self._image_cache.move_to_end(asset_path)
+            return cached
+        
+        decoded = self._decode_image(asset_path)
+        if decoded is not None:
+            self._cache_image(asset_path, decoded)
+        return decoded
+    
+    def _cache_image(self, asset_path: str, decoded: Tuple[np.ndarray, np.ndarray]):
+        """Add a decoded (BGR, grayscale) pair to the image cache, evicting the oldest entry"""
+        self._image_cache[asset_path] = decoded
+        if len(self._image_cache) > self.IMAGE_CACHE_SIZE:
+            self._image_cache.popitem(last=False)
+    
+    def _decode_image(self, asset_path: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Decode an image asset into read-only BGR and grayscale arrays (safe to call from worker threads)"""
         full_path = self.assets_path / asset_path
+        box = self._atlas_index.get(asset_path)
         
-        if not full_path.exists():
+        if box is None and not full_path.exists():
             logger.warning(f"Asset not found: {full_path}")
             return None
             
         try:
-            # Load image with OpenCV
-            image = cv2.imread(str(full_path))
-            if image is None:
-                logger.error(f"Failed to load image: {full_path}")
-                return None
-                
-            return image
+            if box is not None:
+                # Slice the sprite out of the memory-mapped atlas (a view, no decode)
+                x, y, w, h = box
+                image = self._atlas[y:y + h, x:x + w]
+            else:
+                # Load image with OpenCV
+                image = cv2.imread(str(full_path))
+                if image is None:
+                    logger.error(f"Failed to load image: {full_path}")
+                    return None
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         except Exception as e:
             logger.error(f"Error loading image {full_path}: {e}")
             return None
+        
+        # Cached arrays are shared between callers, so make them read-only
+        image.flags.writeable = False
+        gray.flags.writeable = False
+        return image, gray
+    
+    def preload_images(self, asset_paths: List[str]):
+        """Decode many image assets into the cache at once, overlapping the decodes on a thread pool"""
+        pending = [path for path in dict.fromkeys(asset_paths) if path not in self._image_cache]
+        if not pending:
+            return
+        
+        # cv2.imread releases the GIL; the cache itself is only touched from this thread
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="asset-decode") as executor:
+            for path, decoded in zip(pending, executor.map(self._decode_image, pending)):
+                if decoded is not None:
+                    self._cache_image(path, decoded)
+    
+    def load_image_asset(self, asset_path: str) -> Optional[np.ndarray]:
+        """Load an image asset as OpenCV format"""
+        cached = self._load_cached_image(asset_path)
+        return cached[0] if cached is not None else None
+    
+    def load_image_asset_gray(self, asset_path: str) -> Optional[np.ndarray]:
+        """Load an image asset as a grayscale OpenCV image"""
+        cached = self._load_cached_image(asset_path)
+        return cached[1] if cached is not None else None
     
     def get_enemy_assets(self) -> List[Dict[str, Any]]:
         """Get all enemy-related assets"""
@@ -107,18 +556,10 @@ class AssetLoader:
     def find_asset_by_name(self, name: str, category: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Find an asset by name, optionally within a specific category"""
         if category:
-            assets = self.get_assets_by_category(category)
-        else:
-            # Search all categories
-            assets = []
-            for cat_assets in self.asset_index.values():
-                assets.extend(cat_assets)
-        
-        for asset in assets:
-            if asset['name'].lower() == name.lower():
-                return asset
+            return self._name_index.get((category, name.lower()))
         
-        return None
+        # Search all categories
+        return self._name_index_any.get(name.lower())
     
     def load_asset_images(self, category: str) -> Dict[str, np.ndarray]:
         """Load all image assets from a category"""
@@ -128,10 +569,13 @@ class AssetLoader:
         # Define maximum template sizes to prevent memory issues
         max_width = 1920  # Screen width
         max_height = 1080  # Screen height
-        max_template_size = 200  # Maximum template size for detection
+        max_template_size = self.MAX_TEMPLATE_SIZE  # Maximum template size for detection
+        
+        # Decode the whole category in parallel up front; the loop below then reads the cache
+        self.preload_images([asset['path'] for asset in assets if asset['type'] in self.IMAGE_TYPES])
         
         for asset in assets:
-            if asset['type'] in ['png', 'jpg', 'jpeg']:
+            if asset['type'] in self.IMAGE_TYPES:
                 image = self.load_image_asset(asset['path'])
                 if image is not None:
                     # Filter out oversized templates
@@ -157,69 +601,265 @@ class AssetLoader:
         return self.spritesheet_data.get(sprite_name)
     
     def create_template_matcher(self, template_image: np.ndarray, threshold: float = 0.8):
-        """Create a template matching function for a specific image"""
-        def match_template(screen_image: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """Create a template matching function for a specific image (BGR or already grayscale)"""
+        # Convert the template to grayscale for better matching
+        if len(template_image.shape) == 3:
+            template_gray = cv2.cvtColor(template_image, cv2.COLOR_BGR2GRAY)
+        else:
+            template_gray = template_image
+        h, w = template_gray.shape[:2]
+        
+        # A single-colour template has no shape to correlate: TM_CCOEFF_NORMED scores it
+        # as a match on every flat patch of the frame, so it never yields a useful match
+        flat = int(template_gray.min()) == int(template_gray.max())
+        
+        # Downscale the template for a coarse search while it stays large enough to be distinctive
+        levels = 0
+        while (levels < self.PYRAMID_LEVELS and
+               min(h, w) >= self.PYRAMID_MIN_TEMPLATE_SIZE * 2 ** (levels + 1)):
+            levels += 1
+        coarse_template = template_gray
+        for _ in range(levels):
+            coarse_template = cv2.pyrDown(coarse_template)
+        # Drop the border pixel that the blur mixes with whatever surrounds the sprite on screen;
+        # on mostly flat sprites it would otherwise swamp the correlation
+        coarse_template = np.ascontiguousarray(coarse_template[1:-1, 1:-1])
+        
+        # TM_CCOEFF_NORMED's template side is fixed: subtract the mean and take the norm once,
+        # so matching is a plain TM_CCORR scaled by per-window norms shared across templates
+        template_zero_mean, template_inv_norm = self._zero_mean_template(template_gray)
+        coarse_zero_mean, coarse_inv_norm = None, 0.0
+        if levels:
+            coarse_zero_mean, coarse_inv_norm = self._zero_mean_template(coarse_template)
+            if not coarse_inv_norm:
+                levels = 0  # Nothing left to correlate at the coarse level
+        
+        # A template-sized neighbourhood for non-maximum suppression of the score map
+        nms_kernel = np.ones((h, w), np.uint8)
+        
+        def match_template(screen_image: np.ndarray, frame_stats: Optional[_FrameStats] = None) -> np.ndarray:
             """
-            Match template in screen image
-            Returns list of (x, y, width, height) matches
+            Match template in screen image (pass a grayscale frame to skip the conversion, and
+            the frame's _FrameStats to share its per-frame work with other templates)
+            Returns an (N, 4) int array of (x, y, width, height) matches, one per local score peak
             """
-            # Check if template is smaller than screen image
-            if template_image.shape[0] > screen_image.shape[0] or template_image.shape[1] > screen_image.shape[1]:
-                logger.warning(f"Template size {template_image.shape} is larger than screen size {screen_image.shape}, skipping")
-                return []
+            if flat:
+                return _NO_MATCHES
             
-            # Convert images to grayscale for better matching
-            if len(template_image.shape) == 3:
-                template_gray = cv2.cvtColor(template_image, cv2.COLOR_BGR2GRAY)
-            else:
-                template_gray = template_image
+            # Check if template is smaller than screen image
+            if h > screen_image.shape[0] or w > screen_image.shape[1]:
+                logger.warning(f"Template size {template_gray.shape} is larger than screen size {screen_image.shape}, skipping")
+                return _NO_MATCHES
                 
-            if len(screen_image.shape) == 3:
-                screen_gray = cv2.cvtColor(screen_image, cv2.COLOR_BGR2GRAY)
-            else:
-                screen_gray = screen_image
+            if frame_stats is None:
+                if len(screen_image.shape) == 3:
+                    screen_gray = cv2.cvtColor(screen_image, cv2.COLOR_BGR2GRAY)
+                else:
+                    screen_gray = screen_image
+                frame_stats = _FrameStats(screen_gray)
             
             try:
-                # Perform template matching
-                result = cv2.matchTemplate(screen_gray, template_gray, cv2.TM_CCOEFF_NORMED)
+                # Search the whole frame at full resolution, or only the regions
+                # the coarse pyramid search flagged as candidates
+                if levels:
+                    rois = self._find_candidate_rois(frame_stats, coarse_zero_mean, coarse_inv_norm,
+                                                     levels, threshold, w, h)
+                else:
+                    rois = [None]
                 
-                # Find locations where matching exceeds threshold
-                locations = np.where(result >= threshold)
-                matches = []
-                
-                for pt in zip(*locations[::-1]):  # Switch columns and rows
-                    x, y = pt
-                    w, h = template_gray.shape[::-1]
-                    matches.append((x, y, w, h))
+                # Peaks from every searched region, suppressed together below so a match
+                # found from two regions, or split across them, is still reported once
+                peak_xs, peak_ys, peak_scores = [], [], []
+                for roi in rois:
+                    # Perform template matching
+                    result = frame_stats.match(template_zero_mean, template_inv_norm, roi)
+                    x0, y0 = roi[:2] if roi is not None else (0, 0)
+                    if cv2.minMaxLoc(result)[1] < threshold:
+                        continue
+                    
+                    # Keep only locations above threshold that are the maximum of their
+                    # neighbourhood, instead of every pixel of a match cluster. The
+                    # dilation only needs to cover the above-threshold area plus a template.
+                    above = result >= threshold
+                    bx, by, bw, bh = cv2.boundingRect(above.view(np.uint8))
+                    px0, py0 = max(0, bx - w), max(0, by - h)
+                    px1, py1 = min(result.shape[1], bx + bw + w), min(result.shape[0], by + bh + h)
+                    # Round off the float noise that differs between a region's and the full
+                    # frame's correlation, so both searches see the same ties
+                    scores = np.round(result[py0:py1, px0:px1], self.NMS_SCORE_DECIMALS)
+                    peaks = (scores == cv2.dilate(scores, nms_kernel)) & above[py0:py1, px0:px1]
+                    ys, xs = np.nonzero(peaks)
+                    peak_xs.append(xs + (x0 + px0))
+                    peak_ys.append(ys + (y0 + py0))
+                    peak_scores.append(scores[ys, xs])
                 
+                if not peak_xs:
+                    return _NO_MATCHES
+                xs, ys = np.concatenate(peak_xs), np.concatenate(peak_ys)
+                # Every pixel of a tied plateau passes the dilation test; keep one per match
+                keep = _suppress_overlapping(xs, ys, np.concatenate(peak_scores), w, h)
+                matches = np.empty((len(keep), 4), dtype=np.int32)
+                matches[:, 0] = xs[keep]
+                matches[:, 1] = ys[keep]
+                matches[:, 2] = w
+                matches[:, 3] = h
                 return matches
             except cv2.error as e:
                 logger.error(f"OpenCV error in template matching: {e}")
-                return []
+                return _NO_MATCHES
         
         return match_template
     
-    def create_multi_template_matcher(self, asset_names: List[str], category: str = "enemies", threshold: float = 0.8):
-        """Create a matcher that can detect multiple asset types"""
+    @staticmethod
+    def _zero_mean_template(template_gray: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Return a float32 template with its mean removed, and 1 / its norm (0 for a flat template)"""
+        template = template_gray.astype(np.float32)
+        template -= template.mean()
+        norm = float(np.sqrt(np.square(template, dtype=np.float64).sum()))
+        return template, (1.0 / norm if norm > 0 else 0.0)
+    
+    def _find_candidate_rois(self, frame_stats: _FrameStats, coarse_template: np.ndarray, coarse_inv_norm: float,
+                             levels: int, threshold: float, w: int, h: int) -> List[Optional[Tuple[int, int, int, int]]]:
+        """Run a coarse pyramid match and return full-resolution regions (x0, y0, x1, y1) worth re-matching"""
+        screen_gray = frame_stats.gray
+        coarse_stats = frame_stats.coarse(levels)
+        
+        ch, cw = coarse_template.shape[:2]
+        if ch > coarse_stats.gray.shape[0] or cw > coarse_stats.gray.shape[1]:
+            return [None]
+        
+        result = coarse_stats.match(coarse_template, coarse_inv_norm)
+        candidates = (result >= threshold - self.PYRAMID_COARSE_MARGIN).astype(np.uint8)
+        if not candidates.any():
+            return []
+        
+        # Close small gaps between candidates (a square kernel is much cheaper than an elliptical one)
+        candidates = cv2.morphologyEx(candidates, cv2.MORPH_CLOSE, np.ones((5, 5), np.uint8))
+        _, _, stats, _ = cv2.connectedComponentsWithStats(candidates, connectivity=8)
+        
+        # Scale candidate boxes back up, with slack for the cropped border and one coarse
+        # pixel of rounding plus room for the template
+        scale = 2 ** levels
+        height, width = screen_gray.shape[:2]
+        boxes = []
+        for x, y, bw, bh, _ in stats[1:]:
+            boxes.append([
+                max(0, (x - 2) * scale),
+                max(0, (y - 2) * scale),
+                min(width, (x + bw + 1) * scale + w),
+                min(height, (y + bh + 1) * scale + h),
+            ])
+        return _merge_boxes(boxes)
+    
+    def _color_bounds(self, template_bgr: np.ndarray) -> Optional[Tuple[Tuple[int, int, int], Tuple[int, int, int], float]]:
+        """
+        Get a template's HSV histogram bin range and the minimum frame pixel count in it.
+        Returns None when the range covers every colour, so filtering would never skip it.
+        """
+        hsv = cv2.cvtColor(template_bgr, cv2.COLOR_BGR2HSV)
+        lo, hi = np.percentile(hsv.reshape(-1, 3), [2, 98], axis=0)
+        slack = np.array(self.COLOR_PREFILTER_SLACK)
+        lo = np.clip(lo - slack, 0, np.array(_HSV_RANGES) - 1).astype(int)
+        hi = np.clip(hi + slack, 0, np.array(_HSV_RANGES) - 1).astype(int)
+        
+        lo_bins = tuple(int(v) for v in lo // _HSV_BIN_WIDTHS)
+        hi_bins = tuple(int(v) for v in hi // _HSV_BIN_WIDTHS)
+        if lo_bins == (0, 0, 0) and hi_bins == tuple(b - 1 for b in _HSV_BINS):
+            return None
+        
+        inliers = cv2.countNonZero(cv2.inRange(hsv, lo, hi))
+        return lo_bins, hi_bins, max(1.0, inliers * self.COLOR_PREFILTER_MIN_FRACTION)
+    
+    def create_multi_template_matcher(self, assets: List[Any], category: str = "enemies", threshold: float = 0.8):
+        """
+        Create a matcher that can detect multiple asset types.
+        Assets are given as names (looked up in category) or as asset index entries;
+        their images are only decoded on the first match.
+        """
         templates = {}
+        template_sizes = {}
+        color_bounds = {}
+        scheduled = []
         
-        for name in asset_names:
-            asset = self.find_asset_by_name(name, category)
-            if asset and asset['type'] in ['png', 'jpg', 'jpeg']:
-                image = self.load_image_asset(asset['path'])
-                if image is not None:
-                    templates[name] = self.create_template_matcher(image, threshold)
+        def build_templates():
+            resolved = [(item, item if isinstance(item, dict) else self.find_asset_by_name(item, category))
+                        for item in assets]
+            
+            # Decode every template in parallel up front; the loop below then reads the cache
+            self.preload_images([asset['path'] for _, asset in resolved
+                                 if asset and asset['type'] in self.IMAGE_TYPES])
+            
+            for item, asset in resolved:
+                if asset and asset['type'] in self.IMAGE_TYPES:
+                    template_gray = self.load_image_asset_gray(asset['path'])
+                    if template_gray is not None:
+                        if max(template_gray.shape) > self.MAX_TEMPLATE_SIZE:
+                            logger.debug(f"Skipping large template {asset['name']}: {template_gray.shape[1]}x{template_gray.shape[0]}")
+                            continue
+                        name = asset['name'] if isinstance(item, dict) else item
+                        templates[name] = self.create_template_matcher(template_gray, threshold)
+                        template_sizes[name] = (template_gray.size, template_gray.shape)
+                        bounds = self._color_bounds(self.load_image_asset(asset['path']))
+                        if bounds is not None:
+                            color_bounds[name] = bounds
+            
+            # Submit the largest (slowest) templates first to balance the worker pool, keeping
+            # templates of one shape together so they reuse the frame's window norms
+            scheduled.extend(sorted(templates.items(), key=lambda item: template_sizes[item[0]], reverse=True))
         
-        def match_multiple_templates(screen_image: np.ndarray) -> Dict[str, List[Tuple[int, int, int, int]]]:
-            """Match multiple templates in screen image"""
+        # Fingerprint and results of the previous frame, reused while the screen is unchanged
+        last_frame = (None, None)
+        built = False
+        
+        def match_multiple_templates(screen_image: np.ndarray, signature: Optional[Tuple] = None) -> Dict[str, np.ndarray]:
+            """
+            Match multiple templates in screen image (pass the frame's frame_signature when
+            several matchers run on one frame, so it is computed once)
+            """
+            nonlocal last_frame, built
             results = {}
             
-            for name, matcher in templates.items():
-                matches = matcher(screen_image)
-                if matches:
+            if not built:
+                build_templates()
+                built = True
+            
+            # Idle screens repeat frames exactly; a checksum is far cheaper than matching
+            if signature is None:
+                signature = frame_signature(screen_image)
+            if signature == last_frame[0]:
+                return dict(last_frame[1])
+            
+            # Skip templates whose colours are not on screen (needs a colour frame)
+            candidates = scheduled
+            if color_bounds and screen_image.ndim == 3:
+                table = _get_hsv_bin_table(screen_image, signature)
+                candidates = [
+                    item for item in scheduled
+                    if item[0] not in color_bounds
+                    or _count_in_bins(table, *color_bounds[item[0]][:2]) >= color_bounds[item[0]][2]
+                ]
+            
+            # Convert the frame once and share it, and its window statistics, across every
+            # template of every category matched on this frame
+            frame_stats = _get_frame_stats(screen_image, signature)
+            screen_gray = frame_stats.gray
+            # Build the frame-wide values before the workers start, rather than
+            # have every worker wait on the first one to need them
+            frame_stats.prepare(self.PYRAMID_LEVELS)
+            
+            executor = _get_match_executor()
+            matched = dict(executor.map(lambda item: (item[0], item[1](screen_gray, frame_stats)), candidates))
+            
+            # Report results in the caller's template order
+            for name in templates:
+                matches = matched.get(name)
+                if matches is not None and len(matches):
+                    # The same arrays are handed out again for a repeated frame
+                    matches.flags.writeable = False
                     results[name] = matches
             
-            return results
+            last_frame = (signature, results)
+            return dict(results)
         
         return match_multiple_templates
     
@@ -230,7 +870,7 @@ class AssetLoader:
         # Load terrain assets that might be dangerous
         terrain_images = self.load_asset_images('terrain')
         for name, image in terrain_images.items():
-            if any(keyword in name.lower() for keyword in ['lava', 'spike', 'trap', 'danger', 'damage']):
+            if any(keyword in name.lower() for keyword in self.DAMAGE_KEYWORDS):
                 damage_assets[name] = image
         
         # Load projectile assets
@@ -246,33 +886,60 @@ class AssetLoader:
         # Load terrain assets that are safe
         terrain_images = self.load_asset_images('terrain')
         for name, image in terrain_images.items():
-            if any(keyword in name.lower() for keyword in ['ground', 'floor', 'path', 'safe', 'walkable']):
+            if any(keyword in name.lower() for keyword in self.NAVIGATION_KEYWORDS):
                 nav_assets[name] = image
         
         return nav_assets
     
+    def _select_template_assets(self, category: str, keywords: Optional[Tuple[str, ...]] = None) -> Dict[str, Dict[str, Any]]:
+        """Get image asset index entries from a category by name, without decoding them"""
+        selected = {}
+        for asset in self.get_assets_by_category(category):
+            if asset['type'] not in self.IMAGE_TYPES:
+                continue
+            if keywords and not any(keyword in asset['name'].lower() for keyword in keywords):
+                continue
+            selected[asset['name']] = asset
+        return selected
+    
     def create_detection_pipeline(self):
-        """Create a comprehensive detection pipeline for the bot"""
+        """
+        Create a comprehensive detection pipeline for the bot.
+        The pipeline maps each category to its asset index entries by name;
+        template images are decoded lazily by the matchers.
+        """
         pipeline = {
-            'enemies': self.load_asset_images('enemies'),
-            'projectiles': self.load_asset_images('projectiles'),
-            'dangerous_terrain': self.get_damage_indicators(),
-            'safe_terrain': self.get_navigation_assets(),
-            'ui_elements': self.load_asset_images('ui')
+            'enemies': self._select_template_assets('enemies'),
+            'projectiles': self._select_template_assets('projectiles'),
+            'dangerous_terrain': {**self._select_template_assets('terrain', self.DAMAGE_KEYWORDS),
+                                  **self._select_template_assets('projectiles')},
+            'safe_terrain': self._select_template_assets('terrain', self.NAVIGATION_KEYWORDS),
+            'obstacles': self._select_template_assets('terrain', self.OBSTACLE_KEYWORDS),
+            'ui_elements': self._select_template_assets('ui'),
+            # Everything find_loot looks for, matched in one pass over the frame
+            'loot': {**self._select_template_assets('ui'), **self._select_template_assets('effects')}
         }
         
         # Create matchers for each category
         matchers = {}
-        for category, images in pipeline.items():
-            if images:
-                matchers[category] = self.create_multi_template_matcher(
-                    list(images.keys()), 
-                    category='enemies' if category == 'enemies' else 'projectiles' if category == 'projectiles' else 'terrain'
-                )
+        for category, assets in pipeline.items():
+            if assets:
+                matchers[category] = self.create_multi_template_matcher(list(assets.values()))
         
         return pipeline, matchers
 
 
+def get_loader(assets_dir: str = "assets") -> AssetLoader:
+    """Return a shared AssetLoader for assets_dir, building it only on first use"""
+    # Normalise first so relative and absolute spellings share one loader
+    return _get_loader(os.path.abspath(assets_dir))
+
+
+@functools.lru_cache(maxsize=4)
+def _get_loader(assets_dir: str) -> AssetLoader:
+    return AssetLoader(assets_dir)
+
+
 # Example usage and testing
 if __name__ == "__main__":
     # Configure logging
@@ -281,6 +948,10 @@ if __name__ == "__main__":
     # Initialize asset loader
     loader = AssetLoader()
     
+    # Pack already extracted assets into the sprite atlas: python -m vision.asset_loader --build-atlas
+    if "--build-atlas" in sys.argv[1:]:
+        loader.build_atlas()
+    
     # Print available assets
     print("Available asset categories:")
     for category, assets in loader.asset_index.items():
@@ -8,12 +8,14 @@ import cv2
 import numpy as np
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+from PIL import Image, ImageTk
 import json
 import os
 from pathlib import Path
 import logging
-from vision.detection import capture_screen, find_enemies, find_bullets, find_loot, get_hp_percent
-from vision.asset_loader import AssetLoader
+from vision import detection
+from vision.detection import capture_screen, find_enemies, find_bullets, find_loot, get_hp_percent, reload_calibration
+from vision.asset_loader import get_loader, frame_signature
 
 class VisionCalibrationTool:
     def __init__(self):
@@ -22,8 +24,16 @@ class VisionCalibrationTool:
         self.root.geometry("1200x800")
         
         # Initialize components
-        self.asset_loader = AssetLoader("assets")
+        self.asset_loader = get_loader("assets")
         self.current_frame = None
+        # Display buffers reused across refreshes while the frame size stays the same
+        self._rgb_buf = None
+        self._resized_buf = None
+        # Detection results for the frame in _detection_frame under calibration
+        # _detection_version, filled on first use per detector
+        self._detection_frame = None
+        self._detection_version = None
+        self._detection_cache = {}
         self.calibration_data = {}
         self.load_calibration_data()
         
@@ -187,11 +197,10 @@ class VisionCalibrationTool:
         if image is None:
             return
             
-        # Convert BGR to RGB
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        
-        # Apply detection overlays
-        display_image = image_rgb.copy()
+        # Convert BGR to RGB into the reused display buffer; the overlays are drawn on it directly
+        if self._rgb_buf is None or self._rgb_buf.shape != image.shape:
+            self._rgb_buf = np.empty_like(image)
+        display_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
         
         if self.hp_detection_var.get():
             self.draw_hp_bar(display_image)
@@ -214,10 +223,12 @@ class VisionCalibrationTool:
             scale = min(max_size / width, max_size / height)
             new_width = int(width * scale)
             new_height = int(height * scale)
-            display_image = cv2.resize(display_image, (new_width, new_height))
+            if self._resized_buf is None or self._resized_buf.shape[:2] != (new_height, new_width):
+                self._resized_buf = np.empty((new_height, new_width, 3), dtype=np.uint8)
+            display_image = cv2.resize(display_image, (new_width, new_height), dst=self._resized_buf)
             height, width = new_height, new_width
         
-        # Convert to PhotoImage
+        # Convert to PhotoImage (PhotoImage copies the pixels, so the buffers can be reused)
         image_pil = Image.fromarray(display_image)
         self.photo = ImageTk.PhotoImage(image_pil)
         
@@ -226,6 +237,25 @@ class VisionCalibrationTool:
         self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
         self.canvas.configure(scrollregion=self.canvas.bbox("all"))
         
+    def get_detections(self, kind):
+        """Run a detector ('hp', 'enemies', 'bullets' or 'loot') on the current frame, once per frame"""
+        # Results depend on the calibration too, which saving (or any reload) changes
+        if (self._detection_frame is not self.current_frame
+                or self._detection_version != detection.calibration_version):
+            self._detection_frame = self.current_frame
+            self._detection_version = detection.calibration_version
+            self._detection_cache = {}
+        if kind not in self._detection_cache:
+            if kind == 'hp':
+                self._detection_cache[kind] = get_hp_percent(self.current_frame)
+            else:
+                # The template matchers share one fingerprint of the frame
+                if 'signature' not in self._detection_cache:
+                    self._detection_cache['signature'] = frame_signature(self.current_frame)
+                detector = {'enemies': find_enemies, 'bullets': find_bullets, 'loot': find_loot}[kind]
+                self._detection_cache[kind] = detector(self.current_frame, self._detection_cache['signature'])
+        return self._detection_cache[kind]
+        
     def draw_hp_bar(self, image):
         """Draw HP bar detection overlay"""
         x1, y1 = self.hp_x1_var.get(), self.hp_y1_var.get()
@@ -236,7 +266,7 @@ class VisionCalibrationTool:
         
         # Calculate and display HP percentage
         if self.current_frame is not None:
-            hp_percent = get_hp_percent(self.current_frame)
+            hp_percent = self.get_detections('hp')
             if hp_percent is not None:
                 cv2.putText(image, f"HP: {hp_percent}%", (x1, y1-10), 
                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
@@ -246,7 +276,7 @@ class VisionCalibrationTool:
         if self.current_frame is None:
             return
             
-        enemies = find_enemies(self.current_frame)
+        enemies = self.get_detections('enemies')
         for enemy in enemies:
             x, y = enemy['center']
             cv2.circle(image, (x, y), 20, (0, 0, 255), 2)
@@ -258,7 +288,7 @@ class VisionCalibrationTool:
         if self.current_frame is None:
             return
             
-        bullets = find_bullets(self.current_frame)
+        bullets = self.get_detections('bullets')
         for bullet in bullets:
             x, y = bullet['center']
             cv2.circle(image, (x, y), 5, (255, 0, 0), 2)
@@ -268,7 +298,7 @@ class VisionCalibrationTool:
         if self.current_frame is None:
             return
             
-        loot_items = find_loot(self.current_frame)
+        loot_items = self.get_detections('loot')
         for item in loot_items:
             x, y = item['center']
             cv2.circle(image, (x, y), 15, (0, 255, 255), 2)
@@ -352,6 +382,9 @@ class VisionCalibrationTool:
             
             with open("config/calibration.json", 'w') as f:
                 json.dump(calib_data, f, indent=2)
+            
+            # Apply the new values to detection in this process straight away
+            reload_calibration()
                 
             self.update_status("Calibration saved successfully")
             logging.info("Calibration data saved")
@@ -367,12 +400,5 @@ class VisionCalibrationTool:
         self.root.mainloop()
 
 if __name__ == "__main__":
-    # Import required modules for image display
-    try:
-        from PIL import Image, ImageTk
-    except ImportError:
-        print("PIL/Pillow is required for image display. Install with: pip install Pillow")
-        exit(1)
-        
     app = VisionCalibrationTool()
     app.run() 
\ No newline at end of file
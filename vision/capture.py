@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Background Screen Capture for ROTMG Bot
+Overlaps grabbing the next frame with detection on the current one, and grabs
+through DXGI Desktop Duplication (dxcam) on Windows when it is installed
+"""
+
+import threading
+import collections
+import logging
+import time
+
+try:
+    import dxcam  # Windows only; much cheaper than GDI capture through mss
+except ImportError:
+    dxcam = None
+
+logger = logging.getLogger(__name__)
+
+# dxcam camera for the primary output, created on first use (None: not created yet,
+# False: unavailable)
+_dxcam_camera = None
+_dxcam_lock = threading.Lock()
+
+
+def grab_dxcam(region=None):
+    """
+    Grab the primary monitor, or a (left, top, right, bottom) region of it, as BGR with dxcam.
+    Returns None when dxcam is not installed, cannot capture, or has no new frame since
+    the last grab (a static screen), so callers fall back to mss for a fresh array.
+    """
+    global _dxcam_camera
+    if dxcam is None or _dxcam_camera is False:
+        return None
+    
+    with _dxcam_lock:
+        try:
+            if _dxcam_camera is None:
+                _dxcam_camera = dxcam.create(output_idx=0, output_color="BGR")
+            frame = _dxcam_camera.grab(region=region)
+        except Exception as e:
+            if _dxcam_camera is None:
+                # No Desktop Duplication here (e.g. remote sessions): stop trying
+                logger.warning(f"dxcam unavailable, capturing with mss: {e}")
+                _dxcam_camera = False
+            else:
+                # e.g. a window region partly off the monitor
+                logger.debug(f"dxcam grab failed, capturing with mss: {e}")
+            return None
+        
+        # None when nothing changed on screen since the last grab
+        return frame
+
+
+class FrameProducer:
+    """Captures frames on a background thread so the next capture overlaps detection.
+    
+    Capture is demand-driven: taking a frame starts the capture of the next one, and
+    nothing more is grabbed until that one is taken. A prefetched frame older than
+    max_age seconds is dropped and a fresh one captured instead. The default keeps the
+    prefetch through a slow detection pass (several 30 FPS loop periods) but drops it
+    after the bots' longer pauses (error back-off, nexus waits), so a consumer never
+    acts on a frame from before it paused.
+    Each frame is a fresh array, so consumers may keep references to old frames.
+    Frame ages are measured with clock (time.monotonic by default).
+    """
+    
+    DEFAULT_MAX_AGE = 0.25
+    
+    def __init__(self, capture_fn, cleanup_fn=None, max_age=DEFAULT_MAX_AGE, clock=time.monotonic):
+        # cleanup_fn runs on the capture thread when it exits (mss handles are per thread)
+        self._capture_fn = capture_fn
+        self._cleanup_fn = cleanup_fn
+        self._max_age = max_age
+        self._clock = clock
+        # (frame, capture end time) of the prefetched frame, and whether the thread should capture
+        self._latest = collections.deque(maxlen=1)
+        self._wanted = False
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+    
+    def start(self):
+        """Start the capture thread (no-op if it is already running)"""
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            self._running = True
+            self._latest.clear()
+            self._wanted = True  # Prefetch the first frame
+        self._thread = threading.Thread(target=self._capture_loop, name="FrameProducer", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self, timeout=1.0):
+        """Stop the capture thread and wait for it to exit; False if it is still running"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+    
+    def get_frame(self, timeout=1.0):
+        """Take a fresh frame, waiting up to timeout; None on timeout or capture failure"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                if not self._condition.wait_for(lambda: self._latest or not self._running,
+                                                deadline - time.monotonic()):
+                    return None
+                if not self._latest:
+                    return None  # Stopped
+                frame, captured_at = self._latest.pop()
+                # Whatever happens to this frame, start capturing the next one
+                self._wanted = True
+                self._condition.notify_all()
+                if frame is None or self._clock() - captured_at <= self._max_age:
+                    return frame
+                # Too old to act on: wait for the capture just requested
+    
+    def _capture_loop(self):
+        """Capture a frame whenever one is wanted, until stopped"""
+        try:
+            while True:
+                with self._condition:
+                    self._condition.wait_for(lambda: self._wanted or not self._running)
+                    if not self._running:
+                        break
+                    self._wanted = False
+                try:
+                    frame = self._capture_fn()
+                except Exception as e:
+                    logger.error(f"Background screen capture failed: {e}")
+                    frame = None
+                finished = self._clock()
+                with self._condition:
+                    self._latest.append((frame, finished))
+                    self._condition.notify_all()
+        finally:
+            if self._cleanup_fn is not None:
+                self._cleanup_fn()
@@ -4,25 +4,42 @@ import mss
 import math
 import json
 import os
+import re
+import functools
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
 from pathlib import Path
-from vision.asset_loader import AssetLoader
+from typing import Dict, List
+from vision.asset_loader import get_loader
+from vision.capture import grab_dxcam
 import logging
 
 # Initialize the asset loader and detection pipeline
-asset_loader = AssetLoader("assets")
+asset_loader = get_loader("assets")
 pipeline, matchers = asset_loader.create_detection_pipeline()
 logger = logging.getLogger(__name__)
 
 # Load calibration data
+CALIBRATION_FILE = Path("config/calibration.json")
 calibration_data = {}
+
+@functools.lru_cache(maxsize=1)
+def _load_calib(mtime_ns):
+    """
+    Parse the calibration file; keyed on its mtime so an unchanged file is not re-parsed.
+    Every load of one mtime shares the same dict, so treat it as read-only
+    """
+    return json.loads(CALIBRATION_FILE.read_bytes())
+
 def load_calibration():
     """Load calibration data from file"""
     global calibration_data
-    calib_file = Path("config/calibration.json")
+    calib_file = CALIBRATION_FILE
     if calib_file.exists():
         try:
-            with open(calib_file, 'r') as f:
-                calibration_data = json.load(f)
+            calibration_data = _load_calib(calib_file.stat().st_mtime_ns)
             logger.info("Calibration data loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load calibration data: {e}")
@@ -31,6 +48,103 @@ def load_calibration():
 # Load calibration on module import
 load_calibration()
 
+# HP bar box (x1, y1, x2, y2) from the user config, used when calibration has no 'hp_bar'
+DEFAULT_HP_BAR_BOX = (50, 900, 250, 920)
+hp_bar_box = DEFAULT_HP_BAR_BOX
+
+# Hue bands (OpenCV 0-180 scale) counted as a filled HP bar: red on both sides of 0
+HP_RED_HUE_RANGES = ((0, 10), (170, 180))
+
+# User config file the HP bar region was read from, and its mtime then; get_hp_percent
+# reloads the region when the file changes (e.g. after calibrate_hp.py saves a new one
+# from another process), checking at most once per HP_CONFIG_POLL_INTERVAL seconds
+HP_CONFIG_POLL_INTERVAL = 1.0
+_hp_config_file = None
+_hp_config_mtime = None
+_hp_config_checked = 0.0
+
+def _mtime_ns(path):
+    """A file's modification time in ns, or None if it does not exist"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def load_hp_config():
+    """Read the HP bar region from the user config, so get_hp_percent does no file parsing"""
+    global hp_bar_box, _hp_config_file, _hp_config_mtime, _hp_config_checked
+    _hp_config_checked = time.monotonic()
+    try:
+        from config import settings
+        _hp_config_file = settings.CONFIG_FILE
+        _hp_config_mtime = _mtime_ns(_hp_config_file)
+        hp_region_config = settings.load_config().get('hp_bar_region', {})
+    except Exception as e:
+        logger.warning(f"Failed to load user config, using defaults: {e}")
+        hp_region_config = {}
+    
+    if hp_region_config:
+        x = hp_region_config.get('x', 50)
+        y = hp_region_config.get('y', 900)
+        width = hp_region_config.get('width', 200)
+        height = hp_region_config.get('height', 20)
+        hp_bar_box = (x, y, x + width, y + height)
+    else:
+        hp_bar_box = DEFAULT_HP_BAR_BOX
+
+# Load the HP bar region on module import
+load_hp_config()
+
+def _apply_calibration():
+    """
+    Resolve the calibration values read every frame (_hp_box, _player_xy, ...) from
+    calibration_data and the HP bar config, so detection does no dict lookups.
+    Runs on import and on every reload.
+    """
+    global _hp_box, _hp_red_bounds, _weapon_slot_box, _template_threshold
+    global _inventory_box, _player_xy, _danger_radius, _player_class_memo, calibration_version
+    thresholds = calibration_data.get('thresholds', {})
+    
+    # Calibrated HP bar first, else the user config region; corners ordered once here
+    hp_config = calibration_data.get('hp_bar', {})
+    if hp_config:
+        x1, y1 = hp_config.get('x1', 50), hp_config.get('y1', 900)
+        x2, y2 = hp_config.get('x2', 250), hp_config.get('y2', 920)
+    else:
+        x1, y1, x2, y2 = hp_bar_box
+    _hp_box = (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+    
+    # inRange (lower, upper) HSV bounds per red hue band, with the calibrated saturation floor
+    red_threshold = thresholds.get('hp_red', 150)
+    _hp_red_bounds = tuple(((hue_lower, red_threshold, 100), (hue_upper, 255, 255))
+                           for hue_lower, hue_upper in HP_RED_HUE_RANGES)
+    
+    weapon_config = calibration_data.get('weapon_slot', {})
+    _weapon_slot_box = (weapon_config.get('x1', 50), weapon_config.get('y1', 820),
+                        weapon_config.get('x2', 90), weapon_config.get('y2', 860))
+    _template_threshold = thresholds.get('template_match', 0.8)
+    
+    inventory_config = calibration_data.get('inventory_region', {})
+    _inventory_box = (inventory_config.get('x1', 1600), inventory_config.get('y1', 400),
+                      inventory_config.get('x2', 1900), inventory_config.get('y2', 800))
+    
+    # Player position defaults to the center of 1920x1080
+    player_config = calibration_data.get('player_position', {})
+    _player_xy = (player_config.get('x', 960), player_config.get('y', 540))
+    _danger_radius = calibration_data.get('danger_radius', 50)
+    
+    # (weapon slot signature, result) of the last infer_player_class call: the HUD icon is
+    # static, so an unchanged slot gives the same answer without matching again. Slot and
+    # threshold may have changed, so the last class result no longer applies
+    _player_class_memo = (None, None)
+    
+    # Lets callers caching detection results notice that they are out of date
+    calibration_version += 1
+
+# Bumped by every (re)load of the calibration values
+calibration_version = 0
+_apply_calibration()
+
 # Optionally, load item values from a metadata file if available
 try:
     import json
@@ -46,117 +160,187 @@ except Exception:
         "Ancient Sword": 3,
     }
 
-# Optionally, build a class icon template set from UI assets
+# Class names as one alternation, matched anywhere in an asset name (e.g. "wizard_icon")
+CLASS_NAME_RE = re.compile("|".join([
+    "wizard", "warrior", "archer", "priest", "knight", "paladin", "assassin", "necromancer",
+    "huntress", "mystic", "trickster", "sorcerer", "ninja", "samurai", "bard", "summoner",
+]))
+
+# Optionally, build a class icon template set from UI assets (grayscale, as they are matched)
 class_templates = {}
 for asset in asset_loader.get_ui_assets():
     name = asset['name'].lower()
-    if any(cls in name for cls in ["wizard", "warrior", "archer", "priest", "knight", "paladin", "assassin", "necromancer", "huntress", "mystic", "trickster", "sorcerer", "ninja", "samurai", "bard", "summoner"]):
-        img = asset_loader.load_image_asset(asset['path'])
+    if CLASS_NAME_RE.search(name):
+        img = asset_loader.load_image_asset_gray(asset['path'])
         if img is not None:
             class_templates[name] = img
 
+# Class icons grouped by shape as zero-mean rows (names, rows, row norms): when the weapon
+# slot is exactly an icon's size, matching it is one dot product per icon, not a matchTemplate
+class_template_vectors = {}
+for shape in {tpl.shape for tpl in class_templates.values()}:
+    names = [name for name, tpl in class_templates.items() if tpl.shape == shape]
+    rows = np.stack([class_templates[name].astype(np.float32).ravel() for name in names])
+    rows -= rows.mean(axis=1, keepdims=True)
+    class_template_vectors[shape] = (names, rows, np.linalg.norm(rows, axis=1))
+
+# A class icon scoring at least this is taken as certain and ends the scan early
+CLASS_CERTAIN_SCORE = 0.95
+
+# Last class detected; tried first since the player's class rarely changes mid-session
+_last_player_class = None
+
+
+# One row per detection: template center, template size and an index into DetectionArray.names
+DETECTION_DTYPE = np.dtype([('cx', np.int16), ('cy', np.int16), ('w', np.int16), ('h', np.int16), ('name_id', np.int16)])
+
+
+@dataclass
+class DetectionArray:
+    """Detections as a structured array (see DETECTION_DTYPE) plus the template names it refers to"""
+    data: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=DETECTION_DTYPE))
+    names: List[str] = field(default_factory=list)
+    
+    @classmethod
+    def from_matches(cls, *match_dicts: Dict[str, np.ndarray]) -> "DetectionArray":
+        """Build from matcher results (template name -> (N, 4) array of x, y, width, height)"""
+        names = [name for matches in match_dicts for name in matches]
+        boxes = [locs for matches in match_dicts for locs in matches.values()]
+        if not boxes:
+            return cls()
+        
+        stacked = np.concatenate(boxes)
+        data = np.empty(len(stacked), dtype=DETECTION_DTYPE)
+        data['w'] = stacked[:, 2]
+        data['h'] = stacked[:, 3]
+        data['cx'] = stacked[:, 0] + stacked[:, 2] // 2
+        data['cy'] = stacked[:, 1] + stacked[:, 3] // 2
+        data['name_id'] = np.repeat(np.arange(len(names)), [len(locs) for locs in boxes])
+        return cls(data, names)
+    
+    @classmethod
+    def from_dicts(cls, detections: List[dict]) -> "DetectionArray":
+        """Build from the list-of-dicts form (a 'center' each, optionally 'name' and 'size')"""
+        names = list(dict.fromkeys(d.get('name', '') for d in detections))
+        name_ids = {name: i for i, name in enumerate(names)}
+        data = np.empty(len(detections), dtype=DETECTION_DTYPE)
+        if not detections:
+            return cls(data, names)
+        
+        centers = np.array([d['center'] for d in detections])
+        sizes = np.array([d.get('size', (0, 0)) for d in detections])
+        data['cx'], data['cy'] = centers[:, 0], centers[:, 1]
+        data['w'], data['h'] = sizes[:, 0], sizes[:, 1]
+        data['name_id'] = [name_ids[d.get('name', '')] for d in detections]
+        return cls(data, names)
+    
+    def __len__(self) -> int:
+        return len(self.data)
+    
+    @property
+    def centers(self) -> np.ndarray:
+        """(N, 2) array of (x, y) detection centers"""
+        return np.stack([self.data['cx'], self.data['cy']], axis=1)
+    
+    def to_dicts(self) -> List[dict]:
+        """Convert to the list-of-dicts form returned by find_enemies and friends"""
+        return [{'center': (cx, cy), 'name': self.names[name_id]}
+                for cx, cy, name_id in zip(self.data['cx'].tolist(), self.data['cy'].tolist(),
+                                           self.data['name_id'].tolist())]
+
+
+def _clamp_box(box, frame):
+    """Clamp an (x1, y1, x2, y2) box to lie within the frame"""
+    h, w = frame.shape[:2]
+    x1, y1, x2, y2 = box
+    return (max(0, min(x1, w-1)), max(0, min(y1, h-1)),
+            max(0, min(x2, w-1)), max(0, min(y2, h-1)))
+
+
+# One mss instance per thread, opened on first capture and reused: its display
+# handles are expensive to open and must not be shared between threads
+_capture_local = threading.local()
+
 
 def capture_screen():
     """Capture a screenshot of the RotMG game window (assumes fullscreen 1080p)."""
-    with mss.mss() as sct:
-        monitor = sct.monitors[1]  # monitor[1] is the first monitor (full screen)
-        img = np.array(sct.grab(monitor))
-        frame = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+    # Desktop Duplication on Windows when dxcam is installed, else mss
+    frame = grab_dxcam()
+    if frame is not None:
         return frame
+    
+    sct = getattr(_capture_local, 'sct', None)
+    if sct is None:
+        sct = _capture_local.sct = mss.mss()
+    shot = sct.grab(sct.monitors[1])  # monitor[1] is the first monitor (full screen)
+    
+    # View the BGRA pixels in place; the BGR conversion makes the only copy
+    img = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+    return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
 
 
-def find_enemies(frame):
-    """Detect enemies in the frame using all available enemy templates."""
+def find_enemies_array(frame, signature=None):
+    """Detect enemies in the frame as a DetectionArray.
+    Pass frame_signature(frame) when several detectors run on one frame, so it is hashed once.
+    """
     if 'enemies' not in matchers:
-        return []
-    
-    # Get threshold from calibration or use default
-    threshold = calibration_data.get('thresholds', {}).get('template_match', 0.8)
+        return DetectionArray()
+    return DetectionArray.from_matches(matchers['enemies'](frame, signature))
+
+
+def find_enemies(frame, signature=None):
+    """Detect enemies in the frame using all available enemy templates."""
+    enemies = find_enemies_array(frame, signature)
     
-    results = []
-    matches = matchers['enemies'](frame)
+    # Distance of every enemy from the frame center in one pass
     h, w = frame.shape[0:2]
-    for name, locs in matches.items():
-        for x, y, tw, th in locs:
-            cx = x + tw // 2
-            cy = y + th // 2
-            dist = math.hypot(cx - w // 2, cy - h // 2)
-            results.append({'center': (cx, cy), 'distance': dist, 'name': name})
+    distances = np.hypot(enemies.data['cx'].astype(np.float64) - w // 2,
+                         enemies.data['cy'].astype(np.float64) - h // 2).tolist()
+    
+    results = enemies.to_dicts()
+    for enemy, dist in zip(results, distances):
+        enemy['distance'] = dist
     return results
 
 
-def find_bullets(frame):
-    """Detect bullets/projectiles in the frame using all available projectile templates."""
+def find_bullets_array(frame, signature=None):
+    """Detect bullets/projectiles in the frame as a DetectionArray."""
     if 'projectiles' not in matchers:
-        return []
-    
-    # Get threshold from calibration or use default
-    threshold = calibration_data.get('thresholds', {}).get('template_match', 0.8)
-    
-    results = []
-    matches = matchers['projectiles'](frame)
-    for name, locs in matches.items():
-        for x, y, tw, th in locs:
-            bx = x + tw // 2
-            by = y + th // 2
-            results.append({'center': (bx, by), 'name': name})
-    return results
+        return DetectionArray()
+    return DetectionArray.from_matches(matchers['projectiles'](frame, signature))
+
 
+def find_bullets(frame, signature=None):
+    """Detect bullets/projectiles in the frame using all available projectile templates."""
+    return find_bullets_array(frame, signature).to_dicts()
 
-def find_loot(frame):
+
+def find_loot_array(frame, signature=None):
+    """Detect lootable items or bags on the ground as a DetectionArray."""
+    # UI elements and effects share one matcher, so the frame is prepared once for both
+    if 'loot' not in matchers:
+        return DetectionArray()
+    return DetectionArray.from_matches(matchers['loot'](frame, signature))
+
+
+def find_loot(frame, signature=None):
     """Detect lootable items or bags on the ground using UI/loot templates."""
-    loot_found = []
-    # Use UI elements and effects for loot detection
-    for category in ['ui_elements', 'effects']:
-        if category in matchers:
-            matches = matchers[category](frame)
-            for name, locs in matches.items():
-                for x, y, tw, th in locs:
-                    loot_found.append({'name': name, 'center': (x + tw // 2, y + th // 2)})
-    return loot_found
+    return find_loot_array(frame, signature).to_dicts()
 
 
 def get_hp_percent(frame):
     """Read the player's HP bar from the frame and return percentage (0-100)."""
-    # Get HP bar coordinates from calibration data or user config
-    hp_config = calibration_data.get('hp_bar', {})
-    
-    # If no calibration data, try user config
-    if not hp_config:
-        try:
-            from config import settings
-            user_config = settings.load_config()
-            hp_region_config = user_config.get('hp_bar_region', {})
-            if hp_region_config:
-                x = hp_region_config.get('x', 50)
-                y = hp_region_config.get('y', 900)
-                width = hp_region_config.get('width', 200)
-                height = hp_region_config.get('height', 20)
-                x1, y1 = x, y
-                x2, y2 = x + width, y + height
-            else:
-                x1, y1, x2, y2 = 50, 900, 250, 920
-        except Exception as e:
-            logger.warning(f"Failed to load user config, using defaults: {e}")
-            x1, y1, x2, y2 = 50, 900, 250, 920
-    else:
-        x1 = hp_config.get('x1', 50)
-        y1 = hp_config.get('y1', 900)
-        x2 = hp_config.get('x2', 250)
-        y2 = hp_config.get('y2', 920)
-    
-    # Ensure coordinates are within frame bounds
-    h, w = frame.shape[:2]
-    x1 = max(0, min(x1, w-1))
-    y1 = max(0, min(y1, h-1))
-    x2 = max(0, min(x2, w-1))
-    y2 = max(0, min(y2, h-1))
+    # A region saved to the user config by another process takes effect within a second;
+    # savers in this process call reload_hp_config() themselves
+    global _hp_config_checked
+    now = time.monotonic()
+    if _hp_config_file is not None and now - _hp_config_checked >= HP_CONFIG_POLL_INTERVAL:
+        _hp_config_checked = now
+        if _mtime_ns(_hp_config_file) != _hp_config_mtime:
+            reload_hp_config()
     
-    # Ensure x1 < x2 and y1 < y2
-    if x1 > x2:
-        x1, x2 = x2, x1
-    if y1 > y2:
-        y1, y2 = y2, y1
+    # HP bar from calibration data or user config (corners already ordered), within the frame
+    x1, y1, x2, y2 = _clamp_box(_hp_box, frame)
     
     hp_region = frame[y1:y2, x1:x2]
     if hp_region.size == 0:
@@ -165,16 +349,13 @@ def get_hp_percent(frame):
     # Convert to HSV and measure red content
     hsv = cv2.cvtColor(hp_region, cv2.COLOR_BGR2HSV)
     
-    # Get red threshold from calibration or use default
-    red_threshold = calibration_data.get('thresholds', {}).get('hp_red', 150)
-    
-    # mask for red color (RotMG HP bar is typically red when filled)
-    red_lower = np.array([0, red_threshold, 100])
-    red_upper = np.array([10, 255, 255])
-    mask = cv2.inRange(hsv, red_lower, red_upper)
+    # Red wraps around hue 0 (RotMG HP bar is typically red when filled); the two
+    # bands are disjoint, so their pixel counts can simply be added
+    red_pixels = 0
+    for lower, upper in _hp_red_bounds:
+        red_pixels += cv2.countNonZero(cv2.inRange(hsv, lower, upper))
     
     # Percentage of pixels that are red in the bar region
-    red_pixels = cv2.countNonZero(mask)
     total_pixels = hp_region.shape[0] * hp_region.shape[1]
     
     if total_pixels == 0:
@@ -184,73 +365,74 @@ def get_hp_percent(frame):
     return max(0, min(100, percent))
 
 
-def infer_player_class(frame):
-    """Identify player class by looking at equipped weapon/ability icons using UI assets."""
-    # Get weapon slot coordinates from calibration or use defaults
-    weapon_config = calibration_data.get('weapon_slot', {})
-    x1 = weapon_config.get('x1', 50)
-    y1 = weapon_config.get('y1', 820)
-    x2 = weapon_config.get('x2', 90)
-    y2 = weapon_config.get('y2', 860)
-    
-    # Ensure coordinates are within frame bounds
-    h, w = frame.shape[:2]
-    x1 = max(0, min(x1, w-1))
-    y1 = max(0, min(y1, h-1))
-    x2 = max(0, min(x2, w-1))
-    y2 = max(0, min(y2, h-1))
+def infer_player_class(frame, force=False):
+    """
+    Identify player class by looking at equipped weapon/ability icons using UI assets.
+    An unchanged weapon slot returns the previous result unless force is set.
+    """
+    global _last_player_class, _player_class_memo
+    # Weapon slot from calibration or defaults, within the frame
+    x1, y1, x2, y2 = _clamp_box(_weapon_slot_box, frame)
     
     weapon_slot = frame[y1:y2, x1:x2]
     if weapon_slot.size == 0:
         return None
         
     gray = cv2.cvtColor(weapon_slot, cv2.COLOR_BGR2GRAY)
+    signature = (gray.shape, zlib.crc32(gray))
+    if not force and signature == _player_class_memo[0]:
+        return _player_class_memo[1]
+    
     detected_class = None
     best_match = 0.0
     
-    # Get threshold from calibration or use default
-    threshold = calibration_data.get('thresholds', {}).get('template_match', 0.8)
+    # Icons the same size as the slot: TM_CCOEFF_NORMED reduces to a single correlation each
+    same_size_scores = {}
+    if gray.shape in class_template_vectors:
+        names, rows, norms = class_template_vectors[gray.shape]
+        slot = gray.astype(np.float32).ravel()
+        slot -= slot.mean()
+        norm = norms * np.linalg.norm(slot)
+        scores = np.divide(rows @ slot, norm, out=np.zeros_like(norm), where=norm > 0)
+        same_size_scores = dict(zip(names, scores.tolist()))
     
-    for cls, tpl in class_templates.items():
-        if tpl is None:
-            continue
-        tpl_gray = cv2.cvtColor(tpl, cv2.COLOR_BGR2GRAY) if len(tpl.shape) == 3 else tpl
-        res = cv2.matchTemplate(gray, tpl_gray, cv2.TM_CCOEFF_NORMED)
-        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
-        if max_val > threshold and max_val > best_match:
+    candidates = list(class_templates)
+    if _last_player_class in class_templates:
+        candidates.remove(_last_player_class)
+        candidates.insert(0, _last_player_class)
+    
+    for cls in candidates:
+        max_val = same_size_scores.get(cls)
+        if max_val is None:
+            tpl_gray = class_templates[cls]
+            if tpl_gray.shape[0] > gray.shape[0] or tpl_gray.shape[1] > gray.shape[1]:
+                continue  # icon larger than the calibrated slot cannot match (matchTemplate would raise)
+            res = cv2.matchTemplate(gray, tpl_gray, cv2.TM_CCOEFF_NORMED)
+            max_val = cv2.minMaxLoc(res)[1]
+        if max_val > _template_threshold and max_val > best_match:
             detected_class = cls
             best_match = max_val
+            if max_val >= CLASS_CERTAIN_SCORE:
+                break
+    
+    if detected_class is not None:
+        _last_player_class = detected_class
+    _player_class_memo = (signature, detected_class)
     return detected_class
 
 
-def find_obstacles(frame):
+def find_obstacles(frame, signature=None):
     """Identify obstacles (non-walkable terrain) in the frame for pathfinding."""
-    # Use terrain templates to identify non-walkable tiles
-    obstacles = []
-    if 'terrain' in matchers:
-        matches = matchers['terrain'](frame)
-        for name, locs in matches.items():
-            if any(keyword in name.lower() for keyword in ['wall', 'rock', 'obstacle', 'lava']):
-                for x, y, tw, th in locs:
-                    obstacles.append({'name': name, 'center': (x + tw // 2, y + th // 2)})
-    return obstacles
+    # The pipeline's obstacle matcher only holds terrain templates named as non-walkable
+    if 'obstacles' not in matchers:
+        return []
+    return DetectionArray.from_matches(matchers['obstacles'](frame, signature)).to_dicts()
 
 
 def inventory_is_full(frame):
     """Check if inventory has no empty slots (by detecting empty slot graphics)."""
-    # Get inventory region from calibration or use defaults
-    inventory_config = calibration_data.get('inventory_region', {})
-    x1 = inventory_config.get('x1', 1600)
-    y1 = inventory_config.get('y1', 400)
-    x2 = inventory_config.get('x2', 1900)
-    y2 = inventory_config.get('y2', 800)
-    
-    # Ensure coordinates are within frame bounds
-    h, w = frame.shape[:2]
-    x1 = max(0, min(x1, w-1))
-    y1 = max(0, min(y1, h-1))
-    x2 = max(0, min(x2, w-1))
-    y2 = max(0, min(y2, h-1))
+    # Inventory region from calibration or defaults, within the frame
+    x1, y1, x2, y2 = _clamp_box(_inventory_box, frame)
     
     inventory_region = frame[y1:y2, x1:x2]
     if inventory_region.size == 0:
@@ -282,31 +464,55 @@ def get_item_value(item_name):
     return item_values.get(item_name, -1)
 
 
+# Dodge directions indexed by the codes classify_bullets returns
+DODGE_DIRECTIONS = ('up', 'down', 'left', 'right')
+
+
+def classify_bullets(bullets):
+    """
+    Danger test and dodge direction for every bullet of a DetectionArray in one pass.
+    Returns (dangerous, dodge): a boolean mask and DODGE_DIRECTIONS indices, one per bullet.
+    """
+    px, py = _player_xy
+    dx = bullets.data['cx'].astype(np.int32) - px
+    dy = bullets.data['cy'].astype(np.int32) - py
+    dangerous = dx * dx + dy * dy < _danger_radius * _danger_radius
+    dodge = np.where(np.abs(dx) > np.abs(dy),
+                     np.where(dy < 0, 0, 1),
+                     np.where(dx < 0, 2, 3)).astype(np.int8)
+    return dangerous, dodge
+
+
 def is_bullet_dangerous(bullet):
-    """Determine if a bullet is on a collision course with the player (simplified)."""
-    bx, by = bullet['center']
-    
-    # Get player position from calibration or assume center
-    player_config = calibration_data.get('player_position', {})
-    px = player_config.get('x', 960)  # center of 1920x1080
-    py = player_config.get('y', 540)
-    
-    # Get danger radius from calibration or use default
-    danger_radius = calibration_data.get('danger_radius', 50)
+    """
+    Determine if a bullet is on a collision course with the player (simplified).
+    Given a DetectionArray or a list of bullets, returns a boolean mask with one entry per bullet.
+    """
+    if isinstance(bullet, list):
+        bullet = DetectionArray.from_dicts(bullet)
+    if isinstance(bullet, DetectionArray):
+        return classify_bullets(bullet)[0]
     
+    # Player position and danger radius from calibration, or the defaults
+    px, py = _player_xy
+    bx, by = bullet['center']
     dist = math.hypot(bx - px, by - py)
-    return dist < danger_radius
+    return dist < _danger_radius
 
 
 def get_dodge_direction(bullet):
-    """Get a direction (e.g. 'left','right','up','down') to dodge the given bullet."""
-    bx, by = bullet['center']
-    
-    # Get player position from calibration or assume center
-    player_config = calibration_data.get('player_position', {})
-    px = player_config.get('x', 960)
-    py = player_config.get('y', 540)
+    """
+    Get a direction (e.g. 'left','right','up','down') to dodge the given bullet.
+    Given a DetectionArray or a list of bullets, returns an array with one direction per bullet.
+    """
+    if isinstance(bullet, list):
+        bullet = DetectionArray.from_dicts(bullet)
+    if isinstance(bullet, DetectionArray):
+        return np.array(DODGE_DIRECTIONS)[classify_bullets(bullet)[1]]
     
+    # Player position from calibration or assume center
+    px, py = _player_xy
+    bx, by = bullet['center']
     if abs(bx - px) > abs(by - py):
         return 'up' if by < py else 'down'
     else:
@@ -316,9 +522,18 @@ def get_dodge_direction(bullet):
 def reload_calibration():
     """Reload calibration data from file (useful for runtime updates)"""
     load_calibration()
+    load_hp_config()
+    _apply_calibration()
     logger.info("Calibration data reloaded")
 
 
+def reload_hp_config():
+    """Reload the HP bar region from the user config (call after saving a new region)"""
+    load_hp_config()
+    _apply_calibration()
+    logger.info("HP bar config reloaded")
+
+
 def get_calibration_status():
     """Get current calibration status and statistics"""
     # Check if HP bar is configured in user config
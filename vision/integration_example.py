@@ -5,6 +5,7 @@ This example shows how to integrate the extracted assets with your existing bot
 """
 
 import cv2
+import math
 import numpy as np
 import logging
 from typing import Dict, List, Tuple, Optional
@@ -13,7 +14,7 @@ from pathlib import Path
 # Import your existing modules
 try:
     from vision.detection import DetectionSystem  # Your existing detection system
-    from vision.asset_loader import AssetLoader
+    from vision.asset_loader import AssetLoader, frame_signature
 except ImportError:
     print("Warning: Some modules not found. This is an example file.")
     DetectionSystem = None
@@ -40,17 +41,17 @@ class EnhancedDetectionSystem:
         except Exception as e:
             logger.error(f"Failed to initialize detection pipeline: {e}")
     
-    def detect_enemies(self, screen_image: np.ndarray) -> List[Dict[str, any]]:
+    def detect_enemies(self, screen_image: np.ndarray, signature: Optional[Tuple] = None) -> List[Dict[str, any]]:
         """Detect enemies in the screen image"""
         if not self.matchers or 'enemies' not in self.matchers:
             return []
         
         try:
-            enemy_matches = self.matchers['enemies'](screen_image)
+            enemy_matches = self.matchers['enemies'](screen_image, signature)
             results = []
             
             for enemy_name, matches in enemy_matches.items():
-                for x, y, w, h in matches:
+                for x, y, w, h in matches.tolist():
                     results.append({
                         'type': 'enemy',
                         'name': enemy_name,
@@ -64,17 +65,17 @@ class EnhancedDetectionSystem:
             logger.error(f"Error detecting enemies: {e}")
             return []
     
-    def detect_projectiles(self, screen_image: np.ndarray) -> List[Dict[str, any]]:
+    def detect_projectiles(self, screen_image: np.ndarray, signature: Optional[Tuple] = None) -> List[Dict[str, any]]:
         """Detect projectiles in the screen image"""
         if not self.matchers or 'projectiles' not in self.matchers:
             return []
         
         try:
-            projectile_matches = self.matchers['projectiles'](screen_image)
+            projectile_matches = self.matchers['projectiles'](screen_image, signature)
             results = []
             
             for projectile_name, matches in projectile_matches.items():
-                for x, y, w, h in matches:
+                for x, y, w, h in matches.tolist():
                     results.append({
                         'type': 'projectile',
                         'name': projectile_name,
@@ -88,17 +89,17 @@ class EnhancedDetectionSystem:
             logger.error(f"Error detecting projectiles: {e}")
             return []
     
-    def detect_dangerous_terrain(self, screen_image: np.ndarray) -> List[Dict[str, any]]:
+    def detect_dangerous_terrain(self, screen_image: np.ndarray, signature: Optional[Tuple] = None) -> List[Dict[str, any]]:
         """Detect dangerous terrain that should be avoided"""
         if not self.matchers or 'dangerous_terrain' not in self.matchers:
             return []
         
         try:
-            danger_matches = self.matchers['dangerous_terrain'](screen_image)
+            danger_matches = self.matchers['dangerous_terrain'](screen_image, signature)
             results = []
             
             for danger_name, matches in danger_matches.items():
-                for x, y, w, h in matches:
+                for x, y, w, h in matches.tolist():
                     results.append({
                         'type': 'dangerous_terrain',
                         'name': danger_name,
@@ -112,17 +113,17 @@ class EnhancedDetectionSystem:
             logger.error(f"Error detecting dangerous terrain: {e}")
             return []
     
-    def detect_safe_terrain(self, screen_image: np.ndarray) -> List[Dict[str, any]]:
+    def detect_safe_terrain(self, screen_image: np.ndarray, signature: Optional[Tuple] = None) -> List[Dict[str, any]]:
         """Detect safe terrain for navigation"""
         if not self.matchers or 'safe_terrain' not in self.matchers:
             return []
         
         try:
-            safe_matches = self.matchers['safe_terrain'](screen_image)
+            safe_matches = self.matchers['safe_terrain'](screen_image, signature)
             results = []
             
             for safe_name, matches in safe_matches.items():
-                for x, y, w, h in matches:
+                for x, y, w, h in matches.tolist():
                     results.append({
                         'type': 'safe_terrain',
                         'name': safe_name,
@@ -160,21 +161,24 @@ class EnhancedDetectionSystem:
     
     def _is_between_points(self, start: Tuple[int, int], middle: Tuple[int, int], end: Tuple[int, int]) -> bool:
         """Check if middle point is between start and end points"""
-        # Simple distance-based check
-        start_to_middle = np.sqrt((middle[0] - start[0])**2 + (middle[1] - start[1])**2)
-        middle_to_end = np.sqrt((end[0] - middle[0])**2 + (end[1] - middle[1])**2)
-        start_to_end = np.sqrt((end[0] - start[0])**2 + (end[1] - start[1])**2)
+        # Simple distance-based check, on squared distances
+        start_to_middle = (middle[0] - start[0])**2 + (middle[1] - start[1])**2
+        middle_to_end = (end[0] - middle[0])**2 + (end[1] - middle[1])**2
+        start_to_end = (end[0] - start[0])**2 + (end[1] - start[1])**2
         
-        # Allow some tolerance for pathfinding
-        return start_to_middle + middle_to_end <= start_to_end * 1.5
+        # Allow some tolerance for pathfinding: sqrt(a) + sqrt(b) <= 1.5 * sqrt(c), squared
+        # (both sides are non-negative), so only one square root is left
+        return start_to_middle + middle_to_end + 2 * math.sqrt(start_to_middle * middle_to_end) <= 2.25 * start_to_end
     
     def analyze_screen(self, screen_image: np.ndarray) -> Dict[str, any]:
         """Comprehensive screen analysis using extracted assets"""
+        # Fingerprint the frame once for every category's matcher
+        signature = frame_signature(screen_image)
         analysis = {
-            'enemies': self.detect_enemies(screen_image),
-            'projectiles': self.detect_projectiles(screen_image),
-            'dangerous_terrain': self.detect_dangerous_terrain(screen_image),
-            'safe_terrain': self.detect_safe_terrain(screen_image),
+            'enemies': self.detect_enemies(screen_image, signature),
+            'projectiles': self.detect_projectiles(screen_image, signature),
+            'dangerous_terrain': self.detect_dangerous_terrain(screen_image, signature),
+            'safe_terrain': self.detect_safe_terrain(screen_image, signature),
             'recommendations': []
         }
         